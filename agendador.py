@@ -0,0 +1,226 @@
+"""
+Agendador residente (estilo cron) para os jobs do SeaTalk
+
+Usado pelo modo --agendar de enviar_dashboard_seatalk.py: o processo fica
+rodando, dispara o job nos horarios da expressao cron (com jitter), evita
+sobreposicao de execucoes e recupera horarios perdidos apos uma parada.
+"""
+
+import asyncio
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+# ============================================
+# EXPRESSAO CRON
+# ============================================
+
+# Limites (min, max) de cada campo: minuto, hora, dia do mes, mes, dia da semana
+CRON_FIELDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+
+def _parse_cron_field(expr: str, low: int, high: int) -> set:
+    """Converte um campo cron (*, */n, a-b, a-b/n, listas com virgula) em um set"""
+    values = set()
+    for part in expr.split(','):
+        step = 1
+        if '/' in part:
+            part, step_str = part.split('/', 1)
+            step = int(step_str)
+            if step <= 0:
+                raise ValueError(f"Passo invalido na expressao cron: '{expr}'")
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start_str, end_str = part.split('-', 1)
+            start, end = int(start_str), int(end_str)
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or start > end:
+            raise ValueError(f"Campo cron fora do intervalo {low}-{high}: '{expr}'")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSpec:
+    """
+    Expressao cron de 5 campos (minuto hora dia mes dia_semana), no horario local
+
+    Domingo = 0 ou 7 no dia da semana (mesmo padrao do cron).
+    """
+
+    def __init__(self, expr: str):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"Expressao cron deve ter 5 campos: '{expr}'")
+        self.expr = expr
+        parsed = [_parse_cron_field(f, lo, hi) for f, (lo, hi) in zip(fields, CRON_FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {d % 7 for d in weekdays}  # 7 tambem e domingo
+        # Mesma regra do cron: se dia e dia da semana forem restritos, vale qualquer um
+        self._dom_any = fields[2] == '*'
+        self._dow_any = fields[4] == '*'
+
+    def _day_matches(self, dt: datetime) -> bool:
+        dom_ok = dt.day in self.days
+        dow_ok = (dt.weekday() + 1) % 7 in self.weekdays
+        if self._dom_any or self._dow_any:
+            return dom_ok and dow_ok
+        return dom_ok or dow_ok
+
+    def next_after(self, dt: datetime) -> datetime:
+        """Retorna o proximo horario (estritamente depois de dt) que satisfaz a expressao"""
+        candidate = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 4)
+        while candidate < limit:
+            if candidate.month not in self.months or not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+        raise ValueError(f"Expressao cron nunca dispara: '{self.expr}'")
+
+    def slots_between(self, start: datetime, end: datetime) -> list:
+        """Lista os horarios da expressao no intervalo (start, end]"""
+        slots = []
+        slot = self.next_after(start)
+        while slot <= end:
+            slots.append(slot)
+            slot = self.next_after(slot)
+        return slots
+
+
+# ============================================
+# AGENDADOR
+# ============================================
+
+class Scheduler:
+    """
+    Dispara uma corrotina nos horarios de um CronSpec
+
+    Args:
+        spec: Expressao cron (str ou CronSpec)
+        job: Funcao async sem argumentos executada a cada disparo
+        jitter: Atraso aleatorio maximo (segundos) somado a cada disparo
+        overlap: 'skip' descarta o disparo se o anterior ainda roda,
+                 'queue' enfileira (no maximo uma) execucao para logo depois
+        catchup_max: Quantos horarios perdidos executar ao iniciar (0 = nenhum)
+        state_file: Arquivo JSON onde o ultimo horario executado e registrado
+    """
+
+    def __init__(
+        self,
+        spec,
+        job,
+        jitter: float = 0,
+        overlap: str = "skip",
+        catchup_max: int = 1,
+        state_file: str = "",
+        name: str = "job"
+    ):
+        if overlap not in ("skip", "queue"):
+            raise ValueError(f"overlap deve ser 'skip' ou 'queue', recebido: '{overlap}'")
+        self.spec = spec if isinstance(spec, CronSpec) else CronSpec(spec)
+        self.job = job
+        self.jitter = max(0.0, float(jitter))
+        self.overlap = overlap
+        self.catchup_max = max(0, int(catchup_max))
+        self.state_file = state_file
+        self.name = name
+        self._running = None
+        self._queued = False
+
+    # ----- estado persistido -----
+
+    def _load_last_slot(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return None
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            return datetime.fromisoformat(state[self.name])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _save_last_slot(self, slot: datetime):
+        if not self.state_file:
+            return
+        state = {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            pass
+        state[self.name] = slot.isoformat()
+        tmp_path = self.state_file + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_file)
+
+    # ----- execucao -----
+
+    async def _run_job(self, slot: datetime):
+        print(f"⏰ [{self.name}] Executando horario {slot:%d/%m/%Y %H:%M}")
+        started = datetime.now()
+        try:
+            await self.job()
+        except Exception as e:
+            print(f"❌ [{self.name}] Erro na execucao: {e}")
+        finally:
+            elapsed = (datetime.now() - started).total_seconds()
+            print(f"✅ [{self.name}] Execucao finalizada em {elapsed:.1f}s")
+            self._save_last_slot(slot)
+
+    async def _run_with_queue(self, slot: datetime):
+        await self._run_job(slot)
+        while self._queued:
+            self._queued = False
+            await self._run_job(datetime.now().replace(second=0, microsecond=0))
+
+    def _trigger(self, slot: datetime):
+        if self._running is not None and not self._running.done():
+            if self.overlap == "queue":
+                self._queued = True
+                print(f"⏳ [{self.name}] Execucao anterior ainda rodando, horario {slot:%H:%M} enfileirado")
+            else:
+                print(f"⏭️ [{self.name}] Execucao anterior ainda rodando, horario {slot:%H:%M} ignorado")
+            return
+        self._running = asyncio.create_task(self._run_with_queue(slot))
+
+    async def _catch_up(self, now: datetime):
+        last_slot = self._load_last_slot()
+        if last_slot is None or self.catchup_max == 0:
+            return
+        missed = self.spec.slots_between(last_slot, now)
+        if not missed:
+            return
+        # Executa apenas os mais recentes: relatorios antigos nao tem mais valor
+        to_run = missed[-self.catchup_max:]
+        print(f"🔁 [{self.name}] {len(missed)} horario(s) perdido(s), recuperando {len(to_run)}")
+        for slot in to_run:
+            await self._run_job(slot)
+
+    async def run_forever(self):
+        """Loop principal do agendador (nao retorna)"""
+        now = datetime.now()
+        print(f"🗓️ [{self.name}] Agendado: '{self.spec.expr}' | jitter {self.jitter:.0f}s | "
+              f"sobreposicao: {self.overlap}")
+        await self._catch_up(now)
+
+        slot = self.spec.next_after(datetime.now())
+        while True:
+            delay = (slot - datetime.now()).total_seconds() + random.uniform(0, self.jitter)
+            print(f"💤 [{self.name}] Proxima execucao: {slot:%d/%m/%Y %H:%M} "
+                  f"(em {max(delay, 0):.0f}s)")
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._trigger(slot)
+            # Se o processo ficou suspenso, pula direto para o proximo horario futuro
+            slot = self.spec.next_after(max(slot, datetime.now() - timedelta(minutes=1)))
@@ -0,0 +1,233 @@
+"""
+Alertas de performance por faixa (sem Streamlit e sem navegador)
+
+Avalia as faixas de cor do dashboard em todas as linhas SOC/HUB de uma vez
+(operacoes vetorizadas do pandas/numpy) e envia para o SeaTalk uma mensagem
+de texto curta apenas com as linhas que estouraram.
+
+Execute:
+    python alertas.py             # uma verificacao
+    python alertas.py --agendar   # residente, nos horarios de ALERT_CRON
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import requests
+
+from agendador import Scheduler
+from carregar_planilhas import PublicSheetFetcher, load_sheet, load_sources, parse_credentials, parse_sources
+from faixas import LEVEL_ICON, band_levels, format_value, load_column_bands
+
+# ============================================
+# CONFIGURACOES
+# ============================================
+
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+SHEET_ID = os.getenv("GOOGLE_SHEET_ID", "")
+SHEET_SOURCES = parse_sources(os.getenv("GOOGLE_SHEET_SOURCES", ""), SHEET_ID)
+SHEET_NAME_SOC = os.getenv("SHEET_NAME_SOC", "SOC")
+SHEET_NAME_HUB = os.getenv("SHEET_NAME_HUB", "HUB")
+GOOGLE_CREDENTIALS = parse_credentials(os.getenv("GOOGLE_CREDENTIALS", ""))
+
+# Nivel minimo que gera alerta (4 = vermelho, 3 = laranja ou pior...)
+ALERT_MIN_LEVEL = int(os.getenv("ALERT_MIN_LEVEL", "4"))
+
+# Faixas extras/override por coluna (JSON, ver load_column_bands)
+ALERT_BANDS = os.getenv("ALERT_BANDS", "")
+
+# Maximo de operacoes listadas por mensagem
+ALERT_MAX_LINES = int(os.getenv("ALERT_MAX_LINES", "40"))
+
+# Modo agendador: a cada 5 minutos por padrao
+ALERT_CRON = os.getenv("ALERT_CRON", "*/5 * * * *")
+
+# Se True, so envia quando o conjunto de estouros muda
+ALERT_ONLY_CHANGES = os.getenv("ALERT_ONLY_CHANGES", "true").lower() == "true"
+
+# Guarda a assinatura do ultimo alerta enviado
+ALERT_STATE_FILE = os.getenv("ALERT_STATE_FILE", ".alertas_estado.json")
+
+# ============================================
+# AVALIACAO
+# ============================================
+
+def evaluate(df: pd.DataFrame, kind: str, column_bands: dict, min_level: int = 4) -> pd.DataFrame:
+    """
+    Lista as linhas cujo nivel e >= min_level
+
+    Args:
+        df: Tabela SOC ou HUB
+        kind: 'SOC' ou 'HUB' (nome da coluna que identifica a operacao)
+
+    Returns:
+        DataFrame com TIPO, OPERACAO, REGIONAL, COLUNA, VALOR e NIVEL
+    """
+    columns = ['TIPO', 'OPERACAO', 'REGIONAL', 'COLUNA', 'VALOR', 'NIVEL']
+    if df.empty or kind not in df.columns:
+        return pd.DataFrame(columns=columns)
+
+    names = df[kind].to_numpy()
+    regionals = df['REGIONAL'].to_numpy() if 'REGIONAL' in df.columns else np.full(len(df), '')
+    parts = []
+    for column, band in column_bands.items():
+        if column not in df.columns:
+            continue
+        levels = band_levels(df[column], band)
+        mask = levels >= min_level
+        if not mask.any():
+            continue
+        parts.append(pd.DataFrame({
+            'TIPO': kind,
+            'OPERACAO': names[mask],
+            'REGIONAL': regionals[mask],
+            'COLUNA': column,
+            'VALOR': df[column].to_numpy()[mask],
+            'NIVEL': levels[mask],
+        }))
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(parts, ignore_index=True)
+
+
+def format_alert_message(breaches: pd.DataFrame, max_lines: int = 40) -> str:
+    """Monta o texto curto do alerta (agrupado por operacao, no maximo max_lines operacoes)"""
+    now = datetime.now().strftime('%d/%m/%Y %H:%M')
+    lines = [f"🚨 Alertas Performance 3PL - {now}"]
+    shown = 0
+    total = breaches.groupby(['TIPO', 'OPERACAO']).ngroups
+    for kind, group in breaches.groupby('TIPO', sort=False):
+        if shown >= max_lines:
+            break
+        by_operation = group.groupby('OPERACAO', sort=False)
+        lines.append(f"{kind} ({by_operation.ngroups}):")
+        for operation, rows in by_operation:
+            if shown >= max_lines:
+                break
+            items = " | ".join(
+                f"{LEVEL_ICON[level]} {column} {format_value(column, value)}"
+                for column, value, level in zip(rows['COLUNA'], rows['VALOR'], rows['NIVEL'])
+            )
+            lines.append(f"• {operation}: {items}")
+            shown += 1
+    if total > shown:
+        lines.append(f"... e mais {total - shown} operacao(oes)")
+    return "\n".join(lines)
+
+
+def breach_signature(breaches: pd.DataFrame) -> str:
+    """Hash do conjunto de estouros (para nao repetir o mesmo alerta)"""
+    keys = sorted(zip(breaches['TIPO'], breaches['OPERACAO'], breaches['COLUNA'], breaches['NIVEL'].astype(int)))
+    return hashlib.sha1(repr(keys).encode('utf-8')).hexdigest()
+
+
+def send_text_to_seatalk(text: str, webhook_url: str, session=None) -> dict:
+    """Envia mensagem de texto para o webhook do SeaTalk"""
+    payload = {"tag": "text", "text": {"content": text}}
+    try:
+        response = (session or requests).post(webhook_url, json=payload, timeout=30)
+        response.raise_for_status()
+        result = response.json() if response.content else response.text
+        if isinstance(result, dict) and result.get('code') == 0:
+            return {'success': True, 'response': result}
+        return {'success': False, 'error': f"Resposta inesperada: {result}", 'response': result}
+    except requests.exceptions.RequestException as e:
+        return {'success': False, 'error': str(e)}
+
+
+# ============================================
+# EXECUCAO
+# ============================================
+
+def _load_last_signature() -> str:
+    try:
+        with open(ALERT_STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f).get('signature', '')
+    except (OSError, ValueError):
+        return ''
+
+
+def _save_last_signature(signature: str):
+    with open(ALERT_STATE_FILE, 'w', encoding='utf-8') as f:
+        json.dump({'signature': signature, 'sent_at': datetime.now().isoformat()}, f)
+
+
+def check_alerts(fetcher: PublicSheetFetcher, session=None) -> dict:
+    """Carrega SOC/HUB, avalia as faixas e envia o alerta se houver estouros"""
+    loaded = load_sources(
+        SHEET_SOURCES,
+        lambda sheet_id, sheet_name: load_sheet(sheet_id, sheet_name, GOOGLE_CREDENTIALS, fetcher),
+        {'SOC': SHEET_NAME_SOC, 'HUB': SHEET_NAME_HUB}
+    )
+    if loaded['failed']:
+        # Sem dados nao da para dizer que esta tudo ok: mantem a assinatura
+        # anterior para nao reenviar o mesmo alerta quando a fonte voltar
+        failed = ", ".join(f"{name} ({kind})" for name, kind in loaded['failed'])
+        print(f"❌ Sem dados de {failed}; verificacao ignorada")
+        return {'success': False, 'sent': False, 'error': f"Sem dados: {failed}", 'failed': loaded['failed']}
+
+    column_bands = load_column_bands(ALERT_BANDS)
+    breaches = pd.concat([
+        evaluate(loaded['frames']['SOC'], 'SOC', column_bands, ALERT_MIN_LEVEL),
+        evaluate(loaded['frames']['HUB'], 'HUB', column_bands, ALERT_MIN_LEVEL),
+    ], ignore_index=True)
+
+    print(f"🔎 {len(breaches)} estouro(s) em {loaded['seconds']:.2f}s de carga")
+    if breaches.empty:
+        # Zera a assinatura: se o mesmo estouro voltar, o alerta e enviado de novo
+        if ALERT_ONLY_CHANGES and _load_last_signature():
+            _save_last_signature('')
+        return {'success': True, 'sent': False, 'breaches': 0}
+
+    signature = breach_signature(breaches)
+    if ALERT_ONLY_CHANGES and signature == _load_last_signature():
+        print("⏭️ Mesmos estouros do ultimo alerta, nada enviado")
+        return {'success': True, 'sent': False, 'breaches': len(breaches)}
+
+    result = send_text_to_seatalk(format_alert_message(breaches, ALERT_MAX_LINES), WEBHOOK_URL, session)
+    if result['success']:
+        _save_last_signature(signature)
+        print("✅ Alerta enviado!")
+    else:
+        print(f"❌ Erro ao enviar alerta: {result.get('error')}")
+    return {**result, 'sent': result['success'], 'breaches': len(breaches)}
+
+
+async def run_scheduler():
+    """Modo residente: fetcher e sessao HTTP ficam abertos entre verificacoes"""
+    fetcher = PublicSheetFetcher()
+    session = requests.Session()
+
+    async def job():
+        await asyncio.to_thread(check_alerts, fetcher, session)
+
+    scheduler = Scheduler(ALERT_CRON, job, overlap="skip", catchup_max=0, name="alertas")
+    await scheduler.run_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verifica faixas e envia alertas de texto para o SeaTalk")
+    parser.add_argument(
+        "--agendar",
+        action="store_true",
+        help="Modo residente: verifica nos horarios de ALERT_CRON"
+    )
+    args = parser.parse_args()
+
+    if not WEBHOOK_URL:
+        print("❌ Configure WEBHOOK_URL para enviar os alertas")
+    elif not SHEET_SOURCES:
+        print("❌ Configure GOOGLE_SHEET_ID (ou GOOGLE_SHEET_SOURCES)")
+    elif args.agendar:
+        try:
+            asyncio.run(run_scheduler())
+        except KeyboardInterrupt:
+            print("👋 Encerrado pelo usuario")
+    else:
+        check_alerts(PublicSheetFetcher())
@@ -0,0 +1,326 @@
+"""
+API HTTP com o snapshot atual do dashboard (JSON ou Arrow IPC)
+
+O dashboard publica em SNAPSHOT_DIR as tabelas que esta exibindo (SOC, HUB e
+os cards do Report). Esta API le esses arquivos e responde sem navegador:
+
+    GET /soc?regional=SPC/SUL          tabela SOC (filtros: regional, soc)
+    GET /hub?hub=HUB-LSP-10,HUB-LES-03 tabela HUB (filtros: regional, hub)
+    GET /report?soc=SOC-MG2            cards do Report em formato longo
+                                       (ainda de exemplo: meta.sample = true)
+    GET /meta                          fonte e horario do snapshot
+
+Formato: ?format=arrow (ou Accept: application/vnd.apache.arrow.stream)
+devolve um stream Arrow IPC; o padrao e JSON. Respostas trazem ETag e
+aceitam If-None-Match (304).
+
+Sem autenticacao: por padrao so escuta em 127.0.0.1 (API_HOST para expor).
+
+Execute (porta 8502 por padrao):
+    python api_snapshot.py
+Ou deixe o dashboard subir junto com SNAPSHOT_API=true.
+"""
+
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from carregar_planilhas import SNAPSHOT_ATTR, SnapshotStore
+
+# ============================================
+# CONFIGURACOES
+# ============================================
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", ".snapshots")
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8502"))
+
+# Chaves dos arquivos publicados pelo dashboard
+TABLES = {'soc': 'atual_SOC', 'hub': 'atual_HUB', 'report': 'atual_REPORT'}
+META_FILE = "atual_meta.json"
+
+# Tabelas publicadas com dado de exemplo (os cards do Report ainda sao fixos)
+SAMPLE_TABLES_KEY = "sample_tables"
+
+# Parametro de URL -> coluna filtrada
+FILTERS = {'regional': 'REGIONAL', 'soc': 'SOC', 'hub': 'HUB'}
+
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+
+# Respostas ja codificadas mantidas em memoria
+RESPONSE_CACHE_SIZE = 128
+
+
+# ============================================
+# PUBLICACAO (chamada pelo dashboard)
+# ============================================
+
+def flatten_report(report_data: list) -> pd.DataFrame:
+    """Converte os cards do Report em tabela longa (uma linha por indicador)"""
+    rows = []
+    for card in report_data:
+        header = {
+            'SOC': card['soc'],
+            'DATA': card['data'],
+            'HORARIO': card['horario'],
+            'PROGRAMADAS': card['programadas'],
+            'FECHADAS': card['fechadas'],
+        }
+        for section, key in (('ABERTAS', 'abertas'), ('PERFORMANCE', 'performance')):
+            for label, (qtd, pct) in card[key].items():
+                rows.append({**header, 'SECAO': section, 'INDICADOR': label, 'QTD': qtd, 'PCT': pct})
+    return pd.DataFrame(rows)
+
+
+def publish_snapshot(store: SnapshotStore, df_soc: pd.DataFrame, df_hub: pd.DataFrame,
+                     report_data: list, meta: dict, report_is_sample: bool = False):
+    """
+    Grava o que o dashboard esta exibindo para a API (so reescreve o que mudou)
+
+    Args:
+        report_is_sample: Os cards do Report sao dados de exemplo; a API marca
+                          as respostas de /report com sample = true
+    """
+    meta = {**meta, SAMPLE_TABLES_KEY: ['report'] if report_is_sample else []}
+    store.save(TABLES['soc'], df_soc)
+    store.save(TABLES['hub'], df_hub)
+    store.save(TABLES['report'], flatten_report(report_data))
+
+    path = os.path.join(store.directory, META_FILE)
+    content = json.dumps(meta, ensure_ascii=False, sort_keys=True, default=str)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if json.dumps(json.load(f).get('meta'), ensure_ascii=False, sort_keys=True, default=str) == content:
+                return
+    except (OSError, ValueError):
+        pass
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'published_at': datetime.now().isoformat()}, f, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+
+
+# ============================================
+# LEITURA
+# ============================================
+
+class SnapshotReader:
+    """Le os arquivos publicados, recarregando so quando mudam (mtime)"""
+
+    def __init__(self, directory: str):
+        self.store = SnapshotStore(directory)
+        self.directory = directory
+        self._frames = {}
+        self._responses = OrderedDict()
+        self._lock = threading.Lock()
+
+    def version(self, name: str) -> int:
+        try:
+            return os.stat(self.store._path(TABLES[name])).st_mtime_ns
+        except OSError:
+            return 0
+
+    def meta_version(self) -> int:
+        try:
+            return os.stat(os.path.join(self.directory, META_FILE)).st_mtime_ns
+        except OSError:
+            return 0
+
+    def frame(self, name: str):
+        """(DataFrame, versao) da tabela; DataFrame None se ainda nao publicada"""
+        version = self.version(name)
+        with self._lock:
+            cached = self._frames.get(name)
+            if cached is not None and cached[1] == version:
+                return cached
+        df = self.store.load(TABLES[name]) if version else None
+        with self._lock:
+            self._frames[name] = (df, version)
+        return df, version
+
+    def meta(self) -> dict:
+        try:
+            with open(os.path.join(self.directory, META_FILE), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {**data.get('meta', {}), 'published_at': data.get('published_at')}
+
+    def cached_response(self, key):
+        with self._lock:
+            response = self._responses.get(key)
+            if response is not None:
+                self._responses.move_to_end(key)
+            return response
+
+    def store_response(self, key, response):
+        with self._lock:
+            self._responses[key] = response
+            while len(self._responses) > RESPONSE_CACHE_SIZE:
+                self._responses.popitem(last=False)
+
+
+def apply_filters(df: pd.DataFrame, filters: dict) -> pd.DataFrame:
+    """Filtra por REGIONAL/SOC/HUB (valores separados por virgula, sem diferenciar maiusculas)"""
+    mask = pd.Series(True, index=df.index)
+    for param, values in filters.items():
+        column = FILTERS[param]
+        if column not in df.columns:
+            continue
+        wanted = {v.strip().upper() for v in values.split(',') if v.strip()}
+        mask &= df[column].astype(str).str.upper().isin(wanted)
+    return df[mask]
+
+
+def encode_json(df: pd.DataFrame, meta: dict) -> bytes:
+    rows = df.to_json(orient='records', date_format='iso', force_ascii=False)
+    return ('{"meta":' + json.dumps(meta, ensure_ascii=False, default=str) + ',"rows":' + rows + '}').encode('utf-8')
+
+
+def _arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Colunas object com tipos misturados (ex: '' em celula numerica vazia do
+    gspread) quebram o pyarrow: viram numero se todo valor preenchido for
+    numerico, senao texto
+    """
+    df = df.copy(deep=False)
+    df.attrs = {}  # O horario do snapshot vai em snapshot_meta
+    for column in df.columns[df.dtypes == object]:
+        values = df[column]
+        blank = values.isna() | (values.astype(str).str.strip() == '')
+        numbers = pd.to_numeric(values.where(~blank), errors='coerce')
+        if numbers[~blank].notna().all():
+            df[column] = numbers
+        else:
+            df[column] = values.where(values.isna(), values.astype(str))
+    return df
+
+
+def encode_arrow(df: pd.DataFrame, meta: dict) -> bytes:
+    import pyarrow as pa
+
+    df = _arrow_safe(df)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b'snapshot_meta': json.dumps(meta, default=str).encode('utf-8'),
+    })
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+# ============================================
+# SERVIDOR HTTP
+# ============================================
+
+class SnapshotHandler(BaseHTTPRequestHandler):
+    reader: SnapshotReader = None
+    server_version = "SnapshotAPI/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "application/json", etag: str = None):
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        if status != 304:
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if status != 304 and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _error(self, status: int, message: str):
+        self._send(status, json.dumps({'error': message}).encode('utf-8'))
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        name = url.path.strip('/').lower()
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if name in ('', 'meta'):
+            body = json.dumps({'meta': self.reader.meta(), 'endpoints': sorted(TABLES) + ['meta']},
+                              ensure_ascii=False).encode('utf-8')
+            self._send(200, body)
+            return
+        if name not in TABLES:
+            self._error(404, f"Endpoint desconhecido: /{name}")
+            return
+
+        wants_arrow = params.get('format') == 'arrow' or ARROW_MIME in self.headers.get('Accept', '')
+        filters = {k: params[k] for k in FILTERS if params.get(k)}
+        version = self.reader.version(name)
+        if not version:
+            self._error(503, "Snapshot ainda nao publicado pelo dashboard")
+            return
+
+        key = (name, version, self.reader.meta_version(), tuple(sorted(filters.items())), wants_arrow)
+        etag = '"' + hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:20] + '"'
+        if etag in self.headers.get('If-None-Match', ''):
+            self._send(304, etag=etag)
+            return
+
+        response = self.reader.cached_response(key)
+        if response is None:
+            df, _ = self.reader.frame(name)
+            if df is None:
+                self._error(503, "Snapshot ainda nao publicado pelo dashboard")
+                return
+            meta = self.reader.meta()
+            meta.update({
+                'saved_at': df.attrs[SNAPSHOT_ATTR].isoformat(),
+                'sample': name in meta.pop(SAMPLE_TABLES_KEY, []),
+            })
+            try:
+                filtered = apply_filters(df, filters)
+                if wants_arrow:
+                    response = (encode_arrow(filtered, meta), ARROW_MIME)
+                else:
+                    response = (encode_json(filtered, meta), "application/json; charset=utf-8")
+            except Exception as e:
+                print(f"❌ Erro ao codificar /{name}: {e}")
+                self._error(500, f"Erro ao codificar /{name}: {e}")
+                return
+            self.reader.store_response(key, response)
+
+        self._send(200, response[0], response[1], etag=etag)
+
+
+def create_server(host: str = API_HOST, port: int = API_PORT, directory: str = SNAPSHOT_DIR) -> ThreadingHTTPServer:
+    """Cria o servidor (chame serve_forever() para atender)"""
+    handler = type('Handler', (SnapshotHandler,), {'reader': SnapshotReader(directory)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_background(host: str = API_HOST, port: int = API_PORT, directory: str = SNAPSHOT_DIR) -> ThreadingHTTPServer:
+    """Sobe a API em uma thread daemon (usado pelo dashboard)"""
+    server = create_server(host, port, directory)
+    threading.Thread(target=server.serve_forever, name="snapshot-api", daemon=True).start()
+    print(f"🛰️ API de snapshot em http://{host}:{port}")
+    return server
+
+
+if __name__ == "__main__":
+    server = create_server()
+    print(f"🛰️ API de snapshot em http://{API_HOST}:{API_PORT} (pasta: {SNAPSHOT_DIR})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("👋 Encerrado pelo usuario")
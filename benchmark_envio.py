@@ -0,0 +1,177 @@
+"""
+Benchmark de memoria do envio de imagens para o webhook
+
+Compara o envio antigo (base64 inteiro + json=payload) com o envio em
+streaming (envio_imagem) a partir da memoria e do arquivo, contra um servidor
+HTTP local que so descarta o corpo. Cada modo roda em um processo separado
+para que o pico de RSS seja so dele.
+
+Execute:
+    python benchmark_envio.py                 # imagens de 5, 20 e 50 MB
+    python benchmark_envio.py --mb 8 --imagens 4
+"""
+
+import argparse
+import base64
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from envio_imagem import post_image
+
+MODES = ['antigo', 'streaming_memoria', 'streaming_arquivo']
+
+
+# ============================================
+# SERVIDOR LOCAL (descarta o corpo)
+# ============================================
+
+class DiscardHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        remaining = int(self.headers.get('Content-Length', 0))
+        while remaining:
+            remaining -= len(self.rfile.read(min(remaining, 1 << 20)))
+        body = b'{"code": 0, "message_id": "benchmark"}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# ============================================
+# ENVIO (processo filho)
+# ============================================
+
+def send_old(session, url: str, image_data: bytes):
+    """Envio como era antes: base64 completo em str + payload serializado pelo requests"""
+    image_base64 = base64.b64encode(image_data).decode('utf-8')
+    payload = {"tag": "image", "image_base64": {"content": image_base64}}
+    return session.post(url, headers={'Content-Type': 'application/json'}, json=payload, timeout=120)
+
+
+def peak_rss_mb() -> float:
+    # VmHWM e o pico so deste processo (ru_maxrss no Linux herda o pico do pai)
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024 / 1e6
+    except OSError:
+        pass
+    # Sem /proc (macOS): ru_maxrss, em bytes no macOS e KB nos demais
+    try:
+        import resource  # Nao existe no Windows; so e importado aqui
+    except ImportError:
+        return float('nan')  # Sem medida de RSS: vale so a coluna do tracemalloc
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1e6
+
+
+def run_child(mode: str, path: str, images: int, url: str) -> dict:
+    """Envia `images` vezes a imagem de `path` e mede memoria do processo"""
+    session = requests.Session()
+    session.post(url, data=b'{}', timeout=10)  # Aquece conexao e imports
+
+    # Imagem ja capturada: o modo de arquivo nao precisa te-la em memoria
+    image_data = None
+    if mode != 'streaming_arquivo':
+        with open(path, 'rb') as f:
+            image_data = f.read()
+
+    rss_before = peak_rss_mb()
+    tracemalloc.start()
+    started = time.perf_counter()
+    for _ in range(images):
+        if mode == 'antigo':
+            response = send_old(session, url, image_data)
+        elif mode == 'streaming_memoria':
+            response = post_image(session, url, memoryview(image_data), timeout=120)
+        else:
+            response = post_image(session, url, path, timeout=120)
+        response.raise_for_status()
+    elapsed = time.perf_counter() - started
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'mode': mode,
+        'seconds': elapsed,
+        'rss_before_mb': rss_before,
+        'rss_peak_mb': peak_rss_mb(),
+        'traced_peak_mb': traced_peak / 1e6,
+    }
+
+
+# ============================================
+# ORQUESTRACAO
+# ============================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de memoria do envio para o SeaTalk")
+    parser.add_argument('--mb', type=float, nargs='+', default=[5, 20, 50], help="Tamanho(s) da imagem em MB")
+    parser.add_argument('--imagens', type=int, default=3, help="Envios por modo")
+    parser.add_argument('--modos', nargs='+', default=MODES, choices=MODES)
+    parser.add_argument('--filho', nargs=3, metavar=('MODO', 'ARQUIVO', 'URL'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.filho:
+        mode, path, url = args.filho
+        print(json.dumps(run_child(mode, path, args.imagens, url)))
+        return
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), DiscardHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/webhook"
+
+    print("=" * 78)
+    print(f"📏 Benchmark de envio ({args.imagens} envio(s) por modo, processo separado por modo)")
+    print("=" * 78)
+    print(f"{'imagem':>8}  {'modo':<18} {'tempo':>8} {'RSS antes':>10} {'RSS pico':>9} "
+          f"{'+RSS':>8} {'+RSS/img':>9} {'py pico':>8}")
+
+    for size_mb in args.mb:
+        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as f:
+            # Bytes aleatorios: nao comprimem, como um PNG real (gerados em blocos)
+            remaining = int(size_mb * 1e6)
+            while remaining:
+                block = min(remaining, 1 << 20)
+                f.write(os.urandom(block))
+                remaining -= block
+            path = f.name
+        try:
+            for mode in args.modos:
+                output = subprocess.run(
+                    [sys.executable, __file__, '--imagens', str(args.imagens), '--filho', mode, path, url],
+                    capture_output=True, text=True, check=True
+                ).stdout
+                r = json.loads(output.strip().splitlines()[-1])
+                growth = r['rss_peak_mb'] - r['rss_before_mb']
+                print(f"{size_mb:>6.0f}MB  {mode:<18} {r['seconds']:>7.2f}s {r['rss_before_mb']:>8.0f}MB "
+                      f"{r['rss_peak_mb']:>7.0f}MB {growth:>6.0f}MB {growth / size_mb:>8.2f}x "
+                      f"{r['traced_peak_mb']:>6.1f}MB")
+        finally:
+            os.remove(path)
+
+    server.shutdown()
+    print()
+    print("+RSS/img = crescimento do pico de RSS dividido pelo tamanho da imagem")
+    print("py pico  = pico das alocacoes Python durante os envios (tracemalloc)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Motor de captura de telas do dashboard (Playwright)
+
+Recebe uma lista de alvos (URL, aba, recorte, chave) e processa todos com um
+pool limitado de paginas em um unico navegador. Os screenshots ficam em
+memoria, indexados pela chave do alvo; gravar em disco e decisao de quem chama.
+"""
+
+import asyncio
+import json
+import os
+
+from perfil_rede import NetworkRecorder
+
+# ============================================
+# ALVOS
+# ============================================
+
+# Campos de um alvo:
+#   key            chave do resultado (obrigatoria, unica)
+#   url            URL do dashboard (padrao: URL informada em load_targets)
+#   tab            aba a clicar: indice (0, 1...) ou trecho do rotulo ("Report")
+#   clip           recorte {"x", "y", "width", "height"} ou None (viewport inteira)
+#   full_page      True captura a pagina inteira em vez da viewport
+#   wait_selector  seletor aguardado antes do screenshot
+#   settle         segundos de espera apos clicar na aba
+#   description    texto usado nos logs e no envio
+DEFAULT_TARGETS = [
+    {
+        'key': 'dashboard_tab1_soc_hub',
+        'description': 'ABA 1 - Tabelas SOC/HUB',
+        'tab': 0,
+        'wait_selector': '[data-testid="stDataFrame"]',
+        'settle': 2,
+    },
+    {
+        'key': 'dashboard_tab2_report',
+        'description': 'ABA 2 - Report Automatico',
+        'tab': 1,
+        'settle': 5,  # Mais tempo para carregar os cards
+    },
+    {
+        'key': 'dashboard_tab3_piores',
+        'description': 'ABA 3 - Piores Operacoes',
+        'tab': 'Piores',
+        'wait_selector': '[data-testid="stDataFrame"]',
+        'settle': 2,
+    },
+]
+
+
+def load_targets(value: str, default_url: str) -> list:
+    """
+    Resolve CAPTURE_TARGETS: vazio (alvos padrao), lista JSON ou caminho de arquivo JSON
+
+    Returns:
+        list: alvos com 'url' e 'description' preenchidos
+    """
+    value = (value or "").strip()
+    if not value:
+        targets = DEFAULT_TARGETS
+    elif value.startswith('['):
+        targets = json.loads(value)
+    else:
+        with open(value, 'r', encoding='utf-8') as f:
+            targets = json.load(f)
+
+    resolved = []
+    keys = set()
+    for target in targets:
+        if target['key'] in keys:
+            raise ValueError(f"Chave de captura repetida: '{target['key']}'")
+        keys.add(target['key'])
+        resolved.append({'url': default_url, 'description': target['key'], **target})
+    return resolved
+
+
+# ============================================
+# CAPTURA
+# ============================================
+
+async def _click_tab(page, tab) -> bool:
+    """Clica na aba por indice ou por trecho do rotulo"""
+    tabs = await page.query_selector_all('button[data-baseweb="tab"]')
+    if isinstance(tab, int):
+        if tab < len(tabs):
+            await tabs[tab].click()
+            return True
+        return False
+    for button in tabs:
+        if tab.lower() in (await button.inner_text()).lower():
+            await button.click()
+            return True
+    return False
+
+
+async def _load_page(page, url: str, wait_time: int):
+    print(f"📊 Acessando dashboard: {url}")
+    await page.goto(url, wait_until='networkidle', timeout=60000)
+
+    print(f"⏳ Aguardando {wait_time}s para dashboard carregar...")
+    await asyncio.sleep(wait_time)
+
+    # Aguarda elementos do Streamlit
+    try:
+        await page.wait_for_selector('[data-testid="stAppViewContainer"]', timeout=10000)
+        print("✅ Dashboard carregado!")
+    except Exception:
+        print("⚠️ Elementos do Streamlit nao detectados, continuando...")
+
+
+async def _capture_target(page, target: dict) -> bytes:
+    description = target['description']
+    print(f"📋 Capturando: {description}")
+
+    if target.get('tab') is not None:
+        try:
+            if await _click_tab(page, target['tab']):
+                print(f"✅ Clicou na aba {target['tab']!r} ({description})")
+                await asyncio.sleep(target.get('settle', 2))
+            else:
+                print(f"⚠️ Aba {target['tab']!r} nao encontrada ({description})")
+        except Exception as e:
+            print(f"⚠️ Nao foi possivel clicar na aba {target['tab']!r}: {e}")
+
+    if target.get('wait_selector'):
+        try:
+            await page.wait_for_selector(target['wait_selector'], timeout=5000)
+        except Exception:
+            print(f"⚠️ Aguardando conteudo renderizar ({description})...")
+            await asyncio.sleep(2)
+
+    # Scroll para o topo
+    await page.evaluate("window.scrollTo(0, 0)")
+    await asyncio.sleep(0.5)
+
+    screenshot = await page.screenshot(
+        full_page=target.get('full_page', False),
+        clip=target.get('clip'),
+        type='png',
+        timeout=30000
+    )
+    print(f"✅ Screenshot capturado: {description} ({len(screenshot)} bytes)")
+    return screenshot
+
+
+async def capture_targets(
+    browser,
+    targets: list,
+    wait_time: int = 5,
+    concurrency: int = 4,
+    viewport: tuple = (1920, 1080),
+    network_profile: dict = None,
+    timing_file: str = ""
+) -> dict:
+    """
+    Captura todos os alvos com ate `concurrency` paginas em paralelo
+
+    Cada pagina e uma sessao Streamlit; alvos seguidos com a mesma URL reaproveitam
+    a pagina ja carregada e so trocam de aba.
+
+    Args:
+        browser: Navegador Playwright aberto (nao e fechado aqui)
+        targets: Lista de alvos (ver load_targets)
+        wait_time: Espera (s) apos o primeiro carregamento de cada pagina
+        concurrency: Maximo de paginas abertas ao mesmo tempo
+        viewport: (largura, altura)
+        network_profile: Perfil de rede (perfil_rede) ou None
+        timing_file: Se definido, grava o tempo das requisicoes em JSON
+
+    Returns:
+        dict: chave do alvo -> bytes do PNG (alvos que falharam ficam de fora),
+              na mesma ordem dos alvos
+    """
+    context = await browser.new_context(
+        viewport={'width': viewport[0], 'height': viewport[1]},
+        device_scale_factor=1
+    )
+
+    # Bloqueia/stub do que o screenshot nao precisa e cache local do frontend
+    recorder = None
+    if network_profile is not None:
+        recorder = NetworkRecorder(network_profile)
+        await recorder.attach(context)
+
+    queue = asyncio.Queue()
+    for target in targets:
+        queue.put_nowait(target)
+    results = {}
+
+    async def worker():
+        page = await context.new_page()
+        loaded_url = None
+        try:
+            while True:
+                try:
+                    target = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    if target['url'] != loaded_url:
+                        await _load_page(page, target['url'], wait_time)
+                        loaded_url = target['url']
+                    results[target['key']] = await _capture_target(page, target)
+                except Exception as e:
+                    print(f"❌ Falha ao capturar '{target['key']}': {e}")
+                    loaded_url = None  # Recarrega a pagina no proximo alvo
+        finally:
+            await page.close()
+
+    try:
+        workers = max(1, min(concurrency, len(targets)))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+    finally:
+        if recorder is not None:
+            recorder.print_report()
+            if timing_file:
+                recorder.save(timing_file)
+        await context.close()
+
+    return {t['key']: results[t['key']] for t in targets if t['key'] in results}
+
+
+def save_screenshots(screenshots: dict, directory: str) -> list:
+    """Grava os screenshots como <diretorio>/<chave>.png e retorna os caminhos"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for key, data in screenshots.items():
+        path = os.path.join(directory, f"{key}.png")
+        with open(path, 'wb') as f:
+            f.write(data)
+        paths.append(path)
+    return paths
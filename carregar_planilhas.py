@@ -0,0 +1,513 @@
+"""
+Carregamento de planilhas do Google Sheets sem depender do Streamlit
+
+Usado pelo dashboard (dashboard_performance.py) e pelos jobs que rodam fora
+dele. A leitura de planilhas publicas usa uma sessao HTTP com pool de conexoes,
+requisicoes condicionais (If-None-Match / If-Modified-Since), resposta
+comprimida e parse do CSV direto do stream com o pyarrow.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from urllib.parse import quote
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow e opcional: sem ele o parse usa o pandas
+    pa_csv = None
+
+# ============================================
+# CONFIGURACOES
+# ============================================
+
+# Base das planilhas publicas (trocada por um servidor local no teste de carga)
+SHEETS_BASE_URL = os.getenv("SHEETS_BASE_URL", "https://docs.google.com/spreadsheets").rstrip("/")
+
+# Endpoint CSV publico do Google Sheets (gviz)
+GVIZ_CSV_URL = SHEETS_BASE_URL + "/d/{sheet_id}/gviz/tq?tqx=out:csv&sheet={sheet_name}"
+
+# Timeout padrao (conexao, leitura) em segundos
+DEFAULT_TIMEOUT = (5, 30)
+
+# Coluna adicionada aos DataFrames unificados com o nome da fonte de origem
+SOURCE_COLUMN = "FONTE"
+
+# Atributo (df.attrs) que marca um DataFrame vindo de snapshot, com o horario do snapshot
+SNAPSHOT_ATTR = "snapshot_saved_at"
+
+
+# ============================================
+# PLANILHA PUBLICA
+# ============================================
+
+class PublicSheetFetcher:
+    """
+    Le abas de planilhas PUBLICAS do Google Sheets como DataFrame
+
+    Guarda ETag/Last-Modified e o ultimo DataFrame de cada aba: quando o
+    Google responde 304 (nao modificado) o resultado anterior e reaproveitado
+    sem baixar nem parsear nada. Estatisticas da ultima leitura de cada aba
+    ficam em `stats[(sheet_id, sheet_name)]`.
+
+    Args:
+        timeout: Timeout (conexao, leitura) em segundos
+        pool_size: Conexoes mantidas abertas por host
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, pool_size: int = 10):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            'Accept': 'text/csv',
+            'Accept-Encoding': 'gzip, deflate',
+        })
+        self.stats = {}
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def build_url(self, sheet_id: str, sheet_name: str) -> str:
+        return GVIZ_CSV_URL.format(sheet_id=sheet_id, sheet_name=quote(sheet_name))
+
+    def fetch(self, sheet_id: str, sheet_name: str) -> pd.DataFrame:
+        """
+        Baixa a aba e retorna um DataFrame (levanta excecao em caso de erro HTTP)
+
+        O DataFrame retornado pode ser o mesmo objeto da leitura anterior
+        (resposta 304), entao nao deve ser modificado pelo chamador.
+        """
+        url = self.build_url(sheet_id, sheet_name)
+        with self._lock:
+            cached = self._cache.get(url)
+
+        headers = {}
+        if cached is not None:
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        started = time.perf_counter()
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            if response.status_code == 304 and cached is not None:
+                self._record(sheet_id, sheet_name, response, 0, 0.0, started)
+                return cached['df']
+
+            response.raise_for_status()
+            response.raw.decode_content = True
+
+            parse_started = time.perf_counter()
+            df = _parse_csv_stream(response.raw)
+            parse_seconds = time.perf_counter() - parse_started
+            # tell() conta os bytes que vieram pela rede (ainda comprimidos)
+            bytes_transferred = response.raw.tell()
+
+            self._record(sheet_id, sheet_name, response, bytes_transferred, parse_seconds, started)
+
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                with self._lock:
+                    self._cache[url] = {'etag': etag, 'last_modified': last_modified, 'df': df}
+            return df
+
+    def _record(self, sheet_id, sheet_name, response, bytes_transferred, parse_seconds, started):
+        stats = {
+            'status': response.status_code,
+            'not_modified': response.status_code == 304,
+            'bytes': bytes_transferred,
+            'encoding': response.headers.get('Content-Encoding', 'identity'),
+            'parse_seconds': parse_seconds,
+            'total_seconds': time.perf_counter() - started,
+        }
+        with self._lock:
+            self.stats[(sheet_id, sheet_name)] = stats
+        print(f"📥 Aba '{sheet_name}': HTTP {stats['status']} | {stats['bytes'] / 1024:.1f} KB "
+              f"({stats['encoding']}) | parse {stats['parse_seconds'] * 1000:.0f} ms | "
+              f"total {stats['total_seconds'] * 1000:.0f} ms")
+
+
+def _parse_csv_stream(stream) -> pd.DataFrame:
+    """Converte o corpo CSV (file-like) em DataFrame, com pyarrow quando disponivel"""
+    if pa_csv is None:
+        return pd.read_csv(stream)
+    table = pa_csv.read_csv(stream, read_options=pa_csv.ReadOptions(use_threads=True))
+    return table.to_pandas()
+
+
+# ============================================
+# PLANILHA PRIVADA (SERVICE ACCOUNT)
+# ============================================
+
+# Escopos somente leitura do Service Account
+GOOGLE_SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets.readonly',
+    'https://www.googleapis.com/auth/drive.readonly'
+]
+
+
+def parse_credentials(creds_str: str):
+    """Converte GOOGLE_CREDENTIALS (JSON puro ou base64) em dict; None se invalido"""
+    if not creds_str:
+        return None
+    try:
+        if creds_str.startswith('{'):
+            return json.loads(creds_str)
+        # Tenta decodificar base64
+        return json.loads(base64.b64decode(creds_str).decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def fetch_private_sheet(sheet_id: str, sheet_name: str, creds_dict: dict, timeout=None) -> pd.DataFrame:
+    """
+    Le uma aba de planilha PRIVADA usando Service Account
+    (levanta excecao em caso de erro)
+    """
+    import gspread
+    from google.oauth2.service_account import Credentials
+
+    credentials = Credentials.from_service_account_info(creds_dict, scopes=GOOGLE_SCOPES)
+    gc = gspread.authorize(credentials)
+    if timeout is not None and hasattr(gc, 'set_timeout'):
+        gc.set_timeout(timeout)
+
+    spreadsheet = gc.open_by_key(sheet_id)
+    worksheet = spreadsheet.worksheet(sheet_name)
+
+    data = worksheet.get_all_records()
+    return pd.DataFrame(data)
+
+
+def load_sheet(sheet_id: str, sheet_name: str, creds_dict=None, fetcher=None) -> pd.DataFrame:
+    """
+    Carrega uma aba fora do Streamlit: privada se houver credenciais, senao publica
+    Retorna DataFrame vazio em caso de erro (mesmo contrato do dashboard).
+    """
+    if not sheet_id:
+        return pd.DataFrame()
+
+    if creds_dict:
+        try:
+            df = fetch_private_sheet(sheet_id, sheet_name, creds_dict)
+            if not df.empty:
+                return df
+        except Exception as e:
+            print(f"❌ Erro ao carregar aba '{sheet_name}' (privada): {e}")
+
+    try:
+        return (fetcher or PublicSheetFetcher()).fetch(sheet_id, sheet_name)
+    except Exception as e:
+        print(f"❌ Erro ao carregar aba '{sheet_name}': {e}")
+        return pd.DataFrame()
+
+
+# ============================================
+# RESILIENCIA (DEADLINE, HEDGE, CIRCUIT BREAKER)
+# ============================================
+
+class CircuitOpenError(RuntimeError):
+    """Chamada recusada porque o circuit breaker esta aberto"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker simples (fechado -> aberto -> meio-aberto)
+
+    Apos `failure_threshold` falhas seguidas, recusa chamadas por
+    `reset_timeout` segundos; depois deixa passar uma chamada de teste.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "fechado"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "meio-aberto"
+            return "aberto"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+# Pool compartilhado para as tentativas (threads nao podem ser canceladas:
+# tentativas abandonadas terminam sozinhas pelo timeout HTTP)
+_ATTEMPT_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="sheets")
+
+
+def call_resilient(
+    fn,
+    deadline: float = 20.0,
+    hedge_after=None,
+    retries: int = 1,
+    backoff: float = 0.5,
+    breaker: CircuitBreaker = None
+):
+    """
+    Executa fn() com prazo total, requisicao "hedge" e novas tentativas
+
+    Args:
+        fn: Funcao sem argumentos (levanta excecao em caso de falha)
+        deadline: Prazo total em segundos; estourado, levanta TimeoutError
+        hedge_after: Se a primeira tentativa nao responder nesse tempo (s),
+                     dispara uma copia em paralelo e usa a que responder primeiro
+        retries: Tentativas extras permitidas (hedge conta como tentativa)
+        backoff: Espera inicial entre tentativas apos erro (dobra a cada erro)
+        breaker: CircuitBreaker opcional; aberto, falha na hora com CircuitOpenError
+    """
+    if breaker is not None and not breaker.allow():
+        raise CircuitOpenError("Circuit breaker aberto: fonte com falhas recentes")
+
+    end = time.monotonic() + deadline
+    attempts_left = 1 + retries
+    pending = set()
+    hedged = False
+    last_error = None
+
+    def launch():
+        nonlocal attempts_left
+        attempts_left -= 1
+        pending.add(_ATTEMPT_POOL.submit(fn))
+
+    launch()
+    while pending:
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            break
+        can_hedge = hedge_after is not None and not hedged and attempts_left > 0
+        done, pending = wait(
+            pending,
+            timeout=min(remaining, hedge_after) if can_hedge else remaining,
+            return_when=FIRST_COMPLETED
+        )
+
+        for future in done:
+            try:
+                result = future.result()
+            except Exception as e:
+                last_error = e
+                continue
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+        if not done:
+            if can_hedge:
+                hedged = True
+                launch()
+            continue
+
+        if not pending and attempts_left > 0:
+            time.sleep(max(0.0, min(backoff, end - time.monotonic())))
+            backoff *= 2
+            launch()
+
+    if breaker is not None:
+        breaker.record_failure()
+    if last_error is not None and not pending:
+        raise last_error
+    raise TimeoutError(f"Prazo de {deadline:g}s esgotado ao carregar dados")
+
+
+# ============================================
+# SNAPSHOTS (ULTIMO DADO REAL VALIDO)
+# ============================================
+
+class SnapshotStore:
+    """
+    Guarda em disco o ultimo DataFrame real carregado de cada aba
+
+    Usado como fallback quando o Google falha, no lugar dos dados de exemplo.
+    O DataFrame lido de volta traz o horario do snapshot em df.attrs[SNAPSHOT_ATTR].
+    """
+
+    def __init__(self, directory: str = ".snapshots"):
+        self.directory = directory
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in key)
+        return os.path.join(self.directory, f"{safe}.pkl")
+
+    def save(self, key: str, df: pd.DataFrame):
+        """Grava o snapshot (ignora se o conteudo nao mudou desde a ultima gravacao)"""
+        digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()
+        digest += ",".join(map(str, df.columns))
+        with self._lock:
+            if self._hashes.get(key) == digest:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            pd.to_pickle({'saved_at': datetime.now(), 'df': df}, tmp_path)
+            os.replace(tmp_path, path)
+            self._hashes[key] = digest
+
+    def load(self, key: str):
+        """Retorna o ultimo snapshot (DataFrame marcado com o horario) ou None"""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            data = pd.read_pickle(path)
+        except Exception as e:
+            print(f"⚠️ Snapshot '{key}' ilegivel: {e}")
+            return None
+        df = data['df']
+        df.attrs[SNAPSHOT_ATTR] = data['saved_at']
+        return df
+
+
+def format_age(saved_at: datetime) -> str:
+    """Idade legivel de um snapshot, ex: '2h 05min'"""
+    minutes = int((datetime.now() - saved_at).total_seconds() // 60)
+    if minutes < 60:
+        return f"{minutes}min"
+    if minutes < 60 * 24:
+        return f"{minutes // 60}h {minutes % 60:02d}min"
+    return f"{minutes // (60 * 24)}d {(minutes // 60) % 24}h"
+
+
+# ============================================
+# MULTIPLAS PLANILHAS / ABAS
+# ============================================
+
+def parse_sources(value: str, default_sheet_id: str = "") -> list:
+    """
+    Interpreta a configuracao de fontes (uma planilha por regional)
+
+    Formatos aceitos:
+        - JSON: [{"name": "SUL", "sheet_id": "abc", "tabs": {"SOC": "SOC_SUL"}}, ...]
+        - Texto: "SUL=abc,SUDESTE=def"
+    Se vazio, usa apenas default_sheet_id (comportamento de planilha unica).
+
+    Returns:
+        list: [{'name': str, 'sheet_id': str, 'tabs': dict}, ...]
+    """
+    value = (value or "").strip()
+    if not value:
+        return [{'name': "", 'sheet_id': default_sheet_id, 'tabs': {}}] if default_sheet_id else []
+
+    if value.startswith('['):
+        sources = []
+        for item in json.loads(value):
+            sources.append({
+                'name': item.get('name', item['sheet_id'][:8]),
+                'sheet_id': item['sheet_id'],
+                'tabs': item.get('tabs', {}),
+            })
+        return sources
+
+    sources = []
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, sheet_id = part.rpartition('=')
+        sources.append({'name': name or sheet_id[:8], 'sheet_id': sheet_id, 'tabs': {}})
+    return sources
+
+
+def load_sources(
+    sources: list,
+    loader,
+    default_tabs: dict,
+    max_workers: int = 8,
+    initializer=None
+) -> dict:
+    """
+    Carrega todas as abas de todas as fontes em paralelo e une por tipo
+
+    Args:
+        sources: Lista de fontes (ver parse_sources)
+        loader: Funcao (sheet_id, sheet_name) -> DataFrame (vazio em caso de erro)
+        default_tabs: Tipo -> nome padrao da aba, ex: {'SOC': 'SOC', 'HUB': 'HUB'}
+        max_workers: Maximo de downloads simultaneos
+        initializer: Executado em cada thread do pool (ex: contexto do Streamlit)
+
+    Returns:
+        dict: {'frames': {tipo: DataFrame}, 'failed': [(fonte, tipo), ...],
+               'stale': [(fonte, tipo, horario_snapshot), ...], 'seconds': tempo total}
+        Com mais de uma fonte, cada linha recebe a coluna FONTE. 'stale' lista
+        as abas que vieram de snapshot (df.attrs[SNAPSHOT_ATTR]).
+    """
+    started = time.perf_counter()
+    jobs = [
+        (source, kind, source['tabs'].get(kind, tab_name))
+        for source in sources
+        for kind, tab_name in default_tabs.items()
+    ]
+    if not jobs:
+        return {'frames': {kind: pd.DataFrame() for kind in default_tabs}, 'failed': [], 'stale': [], 'seconds': 0.0}
+
+    workers = max(1, min(max_workers, len(jobs)))
+    with ThreadPoolExecutor(max_workers=workers, initializer=initializer) as executor:
+        futures = [executor.submit(loader, source['sheet_id'], tab_name) for source, _, tab_name in jobs]
+        results = []
+        for (source, kind, _), future in zip(jobs, futures):
+            try:
+                df = future.result()
+            except Exception as e:
+                print(f"❌ Erro ao carregar '{source['name']}' ({kind}): {e}")
+                df = pd.DataFrame()
+            results.append((source, kind, df))
+
+    tag = len(sources) > 1
+    frames = {}
+    failed = []
+    stale = []
+    for kind in default_tabs:
+        parts = []
+        for source, result_kind, df in results:
+            if result_kind != kind:
+                continue
+            if df is None or df.empty:
+                failed.append((source['name'], kind))
+                continue
+            if SNAPSHOT_ATTR in df.attrs:
+                stale.append((source['name'], kind, df.attrs[SNAPSHOT_ATTR]))
+            parts.append(df.assign(**{SOURCE_COLUMN: source['name']}) if tag else df)
+        frames[kind] = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+    return {'frames': frames, 'failed': failed, 'stale': stale, 'seconds': time.perf_counter() - started}
@@ -7,9 +7,28 @@ Execute: streamlit run dashboard_performance.py
 import streamlit as st
 import pandas as pd
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
-import json
+import threading
+import time
+
+from faixas import BANDS, COLUMN_FORMATS, band_css
+from api_snapshot import publish_snapshot, start_in_background
+from perfilamento import PROFILE_ALLOW_QUERY, PROFILE_ENABLED, profile_run
+from ranking import load_weights, worst_operations
+from tendencias import TREND_METRICS, HistoryStore, trend_figure
+from carregar_planilhas import (
+    SOURCE_COLUMN,
+    CircuitBreaker,
+    PublicSheetFetcher,
+    SnapshotStore,
+    call_resilient,
+    fetch_private_sheet,
+    format_age,
+    load_sources,
+    parse_credentials,
+    parse_sources,
+)
 
 # ============================================
 # CONFIGURACAO DA PAGINA
@@ -22,35 +41,79 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# ============================================
-# CONFIGURACAO DO GOOGLE SHEETS
-# ============================================
+# Perfilamento opcional desta execucao do script (PROFILE=1 ou ?profile=1)
+_profiler = profile_run(
+    "dashboard",
+    enabled=PROFILE_ENABLED or (PROFILE_ALLOW_QUERY and st.query_params.get("profile") == "1")
+)
 
-def get_config(key: str, default: str = "") -> str:
-    """Busca configuracao de secrets do Streamlit ou variaveis de ambiente"""
-    # Tenta Streamlit secrets primeiro (Streamlit Cloud)
-    try:
-        return st.secrets.get(key, os.getenv(key, default))
-    except:
-        return os.getenv(key, default)
+try:
+    # ============================================
+    # CONFIGURACAO DO GOOGLE SHEETS
+    # ============================================
 
-# ID da planilha do Google Sheets (extraido da URL)
-# Exemplo: https://docs.google.com/spreadsheets/d/SHEET_ID/edit
-SHEET_ID = get_config("GOOGLE_SHEET_ID", "")
+    def get_config(key: str, default: str = "") -> str:
+        """Busca configuracao de secrets do Streamlit ou variaveis de ambiente"""
+        # Tenta Streamlit secrets primeiro (Streamlit Cloud)
+        try:
+            return st.secrets.get(key, os.getenv(key, default))
+        except:
+            return os.getenv(key, default)
 
-# Nomes das abas na planilha
-SHEET_NAME_SOC = get_config("SHEET_NAME_SOC", "SOC")
-SHEET_NAME_HUB = get_config("SHEET_NAME_HUB", "HUB")
-SHEET_NAME_REPORT = get_config("SHEET_NAME_REPORT", "REPORT")
+    # ID da planilha do Google Sheets (extraido da URL)
+    # Exemplo: https://docs.google.com/spreadsheets/d/SHEET_ID/edit
+    SHEET_ID = get_config("GOOGLE_SHEET_ID", "")
 
-# Credenciais do Service Account (JSON em base64 ou path para arquivo)
-GOOGLE_CREDENTIALS = get_config("GOOGLE_CREDENTIALS", "")
+    # Varias planilhas (uma por regional), carregadas em paralelo. Ex: "SUL=ID1,SUDESTE=ID2"
+    # ou JSON com abas especificas. Se vazio, usa apenas GOOGLE_SHEET_ID
+    SHEET_SOURCES = parse_sources(get_config("GOOGLE_SHEET_SOURCES", ""), SHEET_ID)
 
-# ============================================
-# ESTILOS CSS
-# ============================================
+    # Maximo de downloads simultaneos
+    SHEET_MAX_WORKERS = int(get_config("SHEET_MAX_WORKERS", "8"))
+
+    # Nomes das abas na planilha
+    SHEET_NAME_SOC = get_config("SHEET_NAME_SOC", "SOC")
+    SHEET_NAME_HUB = get_config("SHEET_NAME_HUB", "HUB")
+    SHEET_NAME_REPORT = get_config("SHEET_NAME_REPORT", "REPORT")
+
+    # Credenciais do Service Account (JSON em base64 ou path para arquivo)
+    GOOGLE_CREDENTIALS = get_config("GOOGLE_CREDENTIALS", "")
+
+    # Prazo total (s) para carregar cada aba, incluindo novas tentativas (privado + publico)
+    SHEET_DEADLINE = float(get_config("SHEET_DEADLINE", "20"))
+
+    # Sem resposta apos esse tempo (s), dispara uma segunda requisicao em paralelo
+    SHEET_HEDGE_AFTER = float(get_config("SHEET_HEDGE_AFTER", "5"))
+
+    # Tentativas extras por aba
+    SHEET_RETRIES = int(get_config("SHEET_RETRIES", "1"))
 
-st.markdown("""
+    # Pasta com o ultimo dado real de cada aba (fallback quando o Google falha)
+    SNAPSHOT_DIR = get_config("SNAPSHOT_DIR", ".snapshots")
+
+    # Historico para a aba de tendencias: pasta, intervalo entre pontos e retencao
+    HISTORY_DIR = get_config("HISTORY_DIR", "historico")
+    HISTORY_BUCKET_MINUTES = int(get_config("HISTORY_BUCKET_MINUTES", "60"))
+    HISTORY_RETENTION_DAYS = int(get_config("HISTORY_RETENTION_DAYS", "35"))
+
+    # Maximo de pontos enviados ao navegador por grafico (LTTB)
+    TREND_POINT_BUDGET = int(get_config("TREND_POINT_BUDGET", "2000"))
+
+    # Aba "Piores": quantas operacoes listar e pesos do score (JSON, ver ranking.load_weights)
+    WORST_N = int(get_config("WORST_N", "10"))
+    WORST_WEIGHTS = load_weights(get_config("WORST_WEIGHTS", ""))
+
+    # API de snapshot (api_snapshot.py) subindo junto com o dashboard, em API_HOST:API_PORT
+    # (sem autenticacao: so localhost por padrao)
+    SNAPSHOT_API = get_config("SNAPSHOT_API", "false").lower() == "true"
+    API_HOST = get_config("API_HOST", "127.0.0.1")
+    API_PORT = int(get_config("API_PORT", "8502"))
+
+    # ============================================
+    # ESTILOS CSS
+    # ============================================
+
+    st.markdown("""
 <style>
     .block-container {
         padding-top: 0.5rem;
@@ -180,287 +243,359 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# ============================================
-# FUNCOES PARA CARREGAR DADOS DO GOOGLE SHEETS
-# ============================================
+    # ============================================
+    # FUNCOES PARA CARREGAR DADOS DO GOOGLE SHEETS
+    # ============================================
+
+    @st.cache_resource
+    def get_public_fetcher() -> PublicSheetFetcher:
+        """Fetcher compartilhado entre sessoes (pool de conexoes + cache de ETag)"""
+        return PublicSheetFetcher(timeout=(5, SHEET_DEADLINE))
+
+
+    @st.cache_resource
+    def get_circuit_breakers() -> dict:
+        """Circuit breakers compartilhados entre sessoes: (acesso, planilha, aba) -> CircuitBreaker"""
+        return {}
+
+
+    _breakers_lock = threading.Lock()
 
-@st.cache_data(ttl=300)  # Cache por 5 minutos
-def load_from_sheets_public(sheet_id: str, sheet_name: str) -> pd.DataFrame:
+
+    def get_circuit_breaker(access: str, sheet_id: str, sheet_name: str) -> CircuitBreaker:
+        """
+    Circuit breaker de uma aba ('public' ou 'private')
+    
+    Um por planilha/aba: uma fonte quebrada (ID ou aba errada) nao derruba as outras
     """
+        breakers = get_circuit_breakers()
+        with _breakers_lock:
+            return breakers.setdefault((access, sheet_id, sheet_name), CircuitBreaker())
+
+
+    @st.cache_resource
+    def get_snapshot_store() -> SnapshotStore:
+        """Snapshots do ultimo dado real valido"""
+        return SnapshotStore(SNAPSHOT_DIR)
+
+
+    @st.cache_resource
+    def get_history_store() -> HistoryStore:
+        """Historico de indicadores para a aba de tendencias"""
+        return HistoryStore(HISTORY_DIR, HISTORY_BUCKET_MINUTES, HISTORY_RETENTION_DAYS)
+
+
+    @st.cache_resource
+    def start_snapshot_api():
+        """Sobe a API de snapshot uma unica vez por processo"""
+        try:
+            return start_in_background(API_HOST, API_PORT, SNAPSHOT_DIR)
+        except OSError as e:
+            # Porta ocupada (ex: api_snapshot.py ja rodando separado)
+            print(f"⚠️ API de snapshot nao iniciada: {e}")
+            return None
+
+
+    @st.cache_data(ttl=60)
+    def load_trend_history(kind: str, since: datetime) -> pd.DataFrame:
+        """Le o historico (cache de 1 minuto: os arquivos mudam no maximo a cada intervalo)"""
+        return get_history_store().load(kind, since)
+
+
+    @st.cache_data(ttl=300)  # Cache por 5 minutos (falhas levantam excecao e nao ficam no cache)
+    def fetch_public_cached(sheet_id: str, sheet_name: str, _deadline: float = SHEET_DEADLINE) -> pd.DataFrame:
+        """Le a aba publica com prazo, hedge e circuit breaker (_deadline fica fora da chave do cache)"""
+        # Resolvido aqui: as threads de tentativa nao tem contexto do Streamlit
+        fetcher = get_public_fetcher()
+        return call_resilient(
+            lambda: fetcher.fetch(sheet_id, sheet_name),
+            deadline=_deadline,
+            hedge_after=SHEET_HEDGE_AFTER,
+            retries=SHEET_RETRIES,
+            breaker=get_circuit_breaker('public', sheet_id, sheet_name)
+        )
+
+
+    def load_from_sheets_public(sheet_id: str, sheet_name: str, deadline: float = SHEET_DEADLINE) -> pd.DataFrame:
+        """
     Carrega dados de uma planilha PUBLICA do Google Sheets
     A planilha deve estar compartilhada como "Qualquer pessoa com o link pode ver"
     """
-    try:
-        url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv&sheet={sheet_name}"
-        df = pd.read_csv(url)
-        return df
-    except Exception as e:
-        st.error(f"Erro ao carregar aba '{sheet_name}': {str(e)}")
-        return pd.DataFrame()
+        try:
+            return fetch_public_cached(sheet_id, sheet_name, deadline)
+        except Exception as e:
+            st.error(f"Erro ao carregar aba '{sheet_name}': {str(e)}")
+            return pd.DataFrame()
 
 
-def get_google_credentials():
-    """
+    def get_google_credentials():
+        """
     Obtem credenciais do Google de diferentes fontes:
     1. st.secrets["gcp_service_account"] (formato Streamlit Cloud)
     2. st.secrets["GOOGLE_CREDENTIALS"] (JSON string)
     3. Variavel de ambiente GOOGLE_CREDENTIALS
     """
-    import base64
-    
-    # Tenta formato Streamlit Cloud (gcp_service_account)
-    try:
-        if "gcp_service_account" in st.secrets:
-            return dict(st.secrets["gcp_service_account"])
-    except:
-        pass
-    
-    # Tenta GOOGLE_CREDENTIALS como JSON string
-    creds_str = get_config("GOOGLE_CREDENTIALS", "")
-    if creds_str:
+        # Tenta formato Streamlit Cloud (gcp_service_account)
         try:
-            if creds_str.startswith('{'):
-                return json.loads(creds_str)
-            else:
-                # Tenta decodificar base64
-                return json.loads(base64.b64decode(creds_str).decode('utf-8'))
+            if "gcp_service_account" in st.secrets:
+                return dict(st.secrets["gcp_service_account"])
         except:
             pass
     
-    return None
+        # Tenta GOOGLE_CREDENTIALS como JSON string (ou base64)
+        return parse_credentials(get_config("GOOGLE_CREDENTIALS", ""))
 
 
-def load_from_sheets_private(sheet_id: str, sheet_name: str) -> pd.DataFrame:
-    """
+    def load_from_sheets_private(sheet_id: str, sheet_name: str, deadline: float = SHEET_DEADLINE) -> pd.DataFrame:
+        """
     Carrega dados de uma planilha PRIVADA do Google Sheets usando Service Account
     """
-    try:
-        import gspread
-        from google.oauth2.service_account import Credentials
-        
-        creds_dict = get_google_credentials()
-        if not creds_dict:
-            return pd.DataFrame()
-        
-        scopes = [
-            'https://www.googleapis.com/auth/spreadsheets.readonly',
-            'https://www.googleapis.com/auth/drive.readonly'
-        ]
-        
-        credentials = Credentials.from_service_account_info(creds_dict, scopes=scopes)
-        gc = gspread.authorize(credentials)
-        
-        spreadsheet = gc.open_by_key(sheet_id)
-        worksheet = spreadsheet.worksheet(sheet_name)
+        try:
+            creds_dict = get_google_credentials()
+            if not creds_dict:
+                return pd.DataFrame()
         
-        data = worksheet.get_all_records()
-        return pd.DataFrame(data)
+            return call_resilient(
+                lambda: fetch_private_sheet(sheet_id, sheet_name, creds_dict, timeout=deadline),
+                deadline=deadline,
+                hedge_after=SHEET_HEDGE_AFTER,
+                retries=SHEET_RETRIES,
+                breaker=get_circuit_breaker('private', sheet_id, sheet_name)
+            )
         
-    except Exception as e:
-        st.error(f"Erro ao carregar aba '{sheet_name}' (privada): {str(e)}")
-        return pd.DataFrame()
+        except Exception as e:
+            st.error(f"Erro ao carregar aba '{sheet_name}' (privada): {str(e)}")
+            return pd.DataFrame()
 
 
-def load_sheet_data(sheet_id: str, sheet_name: str) -> pd.DataFrame:
-    """
-    Carrega dados do Google Sheets (tenta publico primeiro, depois privado)
+    def load_sheet_data(sheet_id: str, sheet_name: str) -> pd.DataFrame:
+        """
+    Carrega dados do Google Sheets (privado se houver credenciais, depois publico)
+    Se ambos falharem, usa o ultimo snapshot real (marcado com o horario em df.attrs)
+    
+    Privado e publico dividem o mesmo SHEET_DEADLINE: com o Google fora, a aba
+    cai no snapshot em no maximo um prazo, e nao em dois
     """
-    if not sheet_id:
-        return pd.DataFrame()
+        if not sheet_id:
+            return pd.DataFrame()
     
-    # Verifica se tem credenciais configuradas
-    has_credentials = get_google_credentials() is not None
+        df = pd.DataFrame()
+        end = time.monotonic() + SHEET_DEADLINE
     
-    if has_credentials:
-        # Se tem credenciais, usa direto (planilha privada)
-        df = load_from_sheets_private(sheet_id, sheet_name)
-        if not df.empty:
-            return df
+        # Verifica se tem credenciais configuradas
+        has_credentials = get_google_credentials() is not None
     
-    # Tenta carregar como planilha publica
-    df = load_from_sheets_public(sheet_id, sheet_name)
+        if has_credentials:
+            # Se tem credenciais, usa direto (planilha privada)
+            df = load_from_sheets_private(sheet_id, sheet_name, SHEET_DEADLINE)
     
-    return df
-
-
-# ============================================
-# DADOS FICTICIOS (FALLBACK)
-# ============================================
-
-def get_sample_data_soc():
-    """Retorna dados de exemplo para SOC"""
-    return pd.DataFrame({
-        'REGIONAL': ['SPC/SUL', 'SPC/SUL', 'SPC/SUL', 'SPI/SUD', 'SPI/SUD', 'SPC/SUL', 'SPC/SUL', 'SPC/SUL', 'SPI/SUD', 'SPC/SUL', 'SPC/SUL', 'SPC/SUL', 'SPC/SUL', 'SPI/SUD', 'SPC/SUL'],
-        'SOC': ['SOC-SP5', 'SOC-SP2', 'SOC-BA2', 'SOC-PR1', 'SOC-PE2', 'SOC-SP8', 'SOC-RJ2', 'SOC-MG2', 'SOC-RJ1', 'SOC-SP7', 'SOC-RS2', 'SOC-SP6', 'SOC-SP15', 'SOC-SP25', 'SOC-GO2'],
-        'EM ATRIBUICAO': [3, 2, 4, 4, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5],
-        'AG. CHEGADA': [6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6],
-        'AG. CARREG.': [89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89],
-        'CARREGANDO': [23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23],
-        'CARREGADOS': [12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12],
-        'AG. DESCARGA': [58, 58, 58, 58, 58, 58, 58, 58, 58, 58, 58, 58, 58, 58, 58],
-        'NO SHOW': [1, 2, 3, 2, 1, 4, 5, 1, 2, 6, 4, 5, 1, 1, 2],
-        '%NS': ['-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%'],
-        'INFRUT.': [10, 15, 1, 2, 1, 9, 1, 2, 6, 4, 5, 1, 1, 2, 2],
-        '% INFRUT.': [0.50, 1.00, 0.75, 0.25, 1.00, 0.30, 0.01, 0.10, 0.15, 0.20, 0.21, 0.21, 0.45, 0.02, 0.02],
-        'CANCELADO': [50, 25, 35, 20, 40, 27, 24, 22, 19, 17, 14, 12, 9, 4, 2],
-        '%CANCELADO': [0.25, 1.50, 0.75, 1.33, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58],
-        'FECHADAS': [2500, 6000, 5000, 7000, 8250, 9500, 10750, 12000, 13250, 14500, 15750, 17000, 18250, 20750, 22000],
-        '%ETA ORIGEM': [99.00, 98.00, 96.00, 93.33, 91.33, 89.33, 87.33, 85.33, 83.33, 81.33, 79.33, 77.33, 75.33, 71.33, 69.33],
-        '%CPT': [96, 83, 93, 70, 91, 80, 78, 76, 74, 72, 70, 67, 65, 61, 59],
-        '%ETA DESTINO': [97, 95, 93, 93, 93, 93, 92, 92, 91, 91, 90, 89, 89, 88, 87],
-        '%SPOT': [-7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50],
-        'SPOT PEND.': [10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10]
-    })
-
-
-def get_sample_data_hub():
-    """Retorna dados de exemplo para HUB"""
-    return pd.DataFrame({
-        'REGIONAL': ['SPC/SUL', 'SPC/SUL', 'SPC/SUL', 'SPI/SUD', 'SPI/SUD', 'SPI/SUD', 'SPC/SUL', 'SPC/SUL', 'SPI/SUD', 'SPI/SUD', 
-                     'SPC/SUL', 'SPC/SUL', 'SPC/SUL', 'SPI/SUD', 'SPI/SUD', 'SPC/SUL', 'SPC/SUL', 'SPC/SUL', 'SPC/SUL', 'SPI/SUD',
-                     'SPI/SUD', 'SPI/SUD', 'SPC/SUL', 'SPC/SUL', 'SPC/SUL', 'SPI/SUD', 'SPI/SUD', 'SPI/SUD', 'SPC/SUL', 'SPC/SUL',
-                     'SPC/SUL', 'SPC/SUL', 'SPC/SUL'],
-        'HUB': ['HUB-LMS-04', 'HUB-LPB-02', 'HUB-LMA-02', 'HUB-LPR-18', 'HUB-LMG-38', 'HUB-LES-03', 'HUB-LPE-06', 'HUB-LMG-21', 
-                'HUB-LSP-26', 'HUB-LMG-43', 'HUB-LSP-35', 'HUB-LSP-73', 'HUB-LES-07', 'HUB-LRJ-21', 'HUB-LES-09', 'HUB-LSP-100',
-                'HUB-LES-10', 'HUB-LMG-23', 'HUB-LPE-11', 'HUB-LSP-63', 'HUB-LRJ-27', 'HUB-LMG-38', 'HUB-LAL-03', 'HUB-LMT-02',
-                'HUB-LSP-97', 'HUB-LSC-13', 'HUB-LRJ-03', 'HUB-LSP-10', 'HUB-LSP-88', 'HUB-LSP-38', 'HUB-LSP-82', 'HUB-LDF-03', 'HUB-LSE-03'],
-        'EM ATRIBUICAO': [3, 2, 4, 4, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 3, 5, 4, 4, 5, 5, 2, 4, 4, 5, 3, 2, 4, 4, 5, 3, 2],
-        'AG. CHEGADA': [6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6],
-        'AG. CARREG.': [89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89],
-        'CARREGANDO': [23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23],
-        'CARREGADOS': [12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12],
-        'AG. DESCARGA': [56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56],
-        'NO SHOW': [1, 2, 1, 2, 3, 5, 9, 1, 2, 6, 4, 5, 8, 6, 1, 2, 10, 15, 1, 2, 3, 5, 10, 15, 1, 2, 3, 5, 9, 1, 2, 4, 4],
-        '%NS': ['0.01%', '0.10%', '0.15%', '0.20%', '0.21%', '0.25%', '0.30%', '0.45%', '0.01%', '0.10%', '0.15%', '0.20%', '0.21%', '0.25%', '0.30%', 
-                '0.45%', '0.01%', '0.10%', '0.15%', '0.01%', '0.10%', '0.15%', '0.20%', '0.21%', '0.25%', '0.01%', '0.10%', '0.15%', '0.20%', '0.21%', '0.25%', '0.01%', '0.10%'],
-        'INFRUT.': [10, 15, 1, 2, 3, 5, 9, 1, 2, 6, 4, 5, 8, 6, 1, 2, 10, 15, 1, 2, 3, 5, 10, 15, 1, 2, 3, 5, 9, 1, 2, 4, 4],
-        '% INFRUT.': [0.50, 1.00, 0.75, 0.25, 1.00, 0.00, 0.30, 0.01, 0.10, 0.15, 0.20, 0.21, 0.25, 0.30, 0.45, 0.02, 0.50, 0.50, 0.50, 0.50, 0.50, 0.50, 1.00, 1.00, 0.75, 0.25, 1.00, 0.00, 0.30, 0.01, 0.10, 0.15, 0.20],
-        'CANCELADO': [50, 25, 35, 20, 40, 29, 24, 22, 19, 17, 14, 12, 9, 7, 4, 2, -1, -4, -6, -9, -11, -14, -16, -19, -21, -24, -26, -29, -31, -34, -36, -39, -41],
-        '%CANCELADO': [0.25, 1.60, 0.75, 1.33, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.83, 1.93, 1.93, 1.98, 2.02, 2.07, 2.12, 2.17, 2.22, 2.28, 2.31, 2.41, 2.45, 2.60, 2.65, 2.80, 2.80],
-        'FECHADAS': [2500, 6000, 5000, 7000, 8250, 9500, 10750, 12000, 13250, 14500, 15750, 17000, 18250, 19500, 20750, 1, 17750, 18515, 19280, 20044, 20809, 21574, 22339, 23103, 23868, 24633, 25397, 26162, 26927, 27692, 28456, 29221, 29986],
-        '%ETA ORIGEM': [99.00, 98.00, 95.00, 93.33, 91.33, 89.33, 87.33, 85.33, 83.33, 81.33, 79.33, 77.33, 75.33, 73.33, 71.33, 69.33, 87.33, 85.33, 83.33, 81.33, 69.33, 67.33, 65.33, 53.33, 51.33, 49.33, 47.33, 45.33, 43.33, 41.33, 39.33, 37.33, 35.33],
-        '%CPT': [96, 83, 93, 70, 91, 80, 78, 76, 74, 72, 70, 67, 65, 63, 61, 59, 57, 55, 53, 51, 49, 48, 44, 42, 40, 38, 36, 34, 30, 28, 26, 25, 23],
-        '%ETA DESTINO': [97, 95, 94, 93, 95, 93, 92, 90, 91, 91, 90, 90, 89, 89, 88, 87, 86, 89, 85, 85, 84, 83, 83, 83, 82, 81, 80, 79, 79, 79, 77, 77, 77],
-        '%SPOT': [-7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50],
-        'SPOT PEND.': [10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10]
-    })
-
-
-# ============================================
-# CARREGAR DADOS
-# ============================================
-
-# Status da fonte de dados
-data_source = "Dados de exemplo (configure GOOGLE_SHEET_ID para usar dados reais)"
-using_real_data = False
-
-if SHEET_ID:
-    df_soc = load_sheet_data(SHEET_ID, SHEET_NAME_SOC)
-    df_hub = load_sheet_data(SHEET_ID, SHEET_NAME_HUB)
+        remaining = end - time.monotonic()
+        if df.empty and remaining > 0:
+            # Tenta carregar como planilha publica com o que sobrou do prazo
+            df = load_from_sheets_public(sheet_id, sheet_name, remaining)
+    
+        store = get_snapshot_store()
+        snapshot_key = f"{sheet_id}_{sheet_name}"
+        if not df.empty:
+            store.save(snapshot_key, df)
+            return df
     
-    if not df_soc.empty and not df_hub.empty:
-        data_source = f"Google Sheets (ID: {SHEET_ID[:20]}...)"
-        using_real_data = True
+        snapshot = store.load(snapshot_key)
+        return snapshot if snapshot is not None else df
+
+
+    def _streamlit_thread_initializer():
+        """Propaga o contexto da sessao Streamlit para as threads do pool de carga"""
+        from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    
+        ctx = get_script_run_ctx()
+        return lambda: add_script_run_ctx(threading.current_thread(), ctx)
+
+
+    # ============================================
+    # DADOS FICTICIOS (FALLBACK)
+    # ============================================
+
+    def get_sample_data_soc():
+        """Retorna dados de exemplo para SOC"""
+        return pd.DataFrame({
+            'REGIONAL': ['SPC/SUL', 'SPC/SUL', 'SPC/SUL', 'SPI/SUD', 'SPI/SUD', 'SPC/SUL', 'SPC/SUL', 'SPC/SUL', 'SPI/SUD', 'SPC/SUL', 'SPC/SUL', 'SPC/SUL', 'SPC/SUL', 'SPI/SUD', 'SPC/SUL'],
+            'SOC': ['SOC-SP5', 'SOC-SP2', 'SOC-BA2', 'SOC-PR1', 'SOC-PE2', 'SOC-SP8', 'SOC-RJ2', 'SOC-MG2', 'SOC-RJ1', 'SOC-SP7', 'SOC-RS2', 'SOC-SP6', 'SOC-SP15', 'SOC-SP25', 'SOC-GO2'],
+            'EM ATRIBUICAO': [3, 2, 4, 4, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5],
+            'AG. CHEGADA': [6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6],
+            'AG. CARREG.': [89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89],
+            'CARREGANDO': [23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23],
+            'CARREGADOS': [12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12],
+            'AG. DESCARGA': [58, 58, 58, 58, 58, 58, 58, 58, 58, 58, 58, 58, 58, 58, 58],
+            'NO SHOW': [1, 2, 3, 2, 1, 4, 5, 1, 2, 6, 4, 5, 1, 1, 2],
+            '%NS': ['-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%', '-3.50%'],
+            'INFRUT.': [10, 15, 1, 2, 1, 9, 1, 2, 6, 4, 5, 1, 1, 2, 2],
+            '% INFRUT.': [0.50, 1.00, 0.75, 0.25, 1.00, 0.30, 0.01, 0.10, 0.15, 0.20, 0.21, 0.21, 0.45, 0.02, 0.02],
+            'CANCELADO': [50, 25, 35, 20, 40, 27, 24, 22, 19, 17, 14, 12, 9, 4, 2],
+            '%CANCELADO': [0.25, 1.50, 0.75, 1.33, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58],
+            'FECHADAS': [2500, 6000, 5000, 7000, 8250, 9500, 10750, 12000, 13250, 14500, 15750, 17000, 18250, 20750, 22000],
+            '%ETA ORIGEM': [99.00, 98.00, 96.00, 93.33, 91.33, 89.33, 87.33, 85.33, 83.33, 81.33, 79.33, 77.33, 75.33, 71.33, 69.33],
+            '%CPT': [96, 83, 93, 70, 91, 80, 78, 76, 74, 72, 70, 67, 65, 61, 59],
+            '%ETA DESTINO': [97, 95, 93, 93, 93, 93, 92, 92, 91, 91, 90, 89, 89, 88, 87],
+            '%SPOT': [-7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50],
+            'SPOT PEND.': [10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10]
+        })
+
+
+    def get_sample_data_hub():
+        """Retorna dados de exemplo para HUB"""
+        return pd.DataFrame({
+            'REGIONAL': ['SPC/SUL', 'SPC/SUL', 'SPC/SUL', 'SPI/SUD', 'SPI/SUD', 'SPI/SUD', 'SPC/SUL', 'SPC/SUL', 'SPI/SUD', 'SPI/SUD', 
+                         'SPC/SUL', 'SPC/SUL', 'SPC/SUL', 'SPI/SUD', 'SPI/SUD', 'SPC/SUL', 'SPC/SUL', 'SPC/SUL', 'SPC/SUL', 'SPI/SUD',
+                         'SPI/SUD', 'SPI/SUD', 'SPC/SUL', 'SPC/SUL', 'SPC/SUL', 'SPI/SUD', 'SPI/SUD', 'SPI/SUD', 'SPC/SUL', 'SPC/SUL',
+                         'SPC/SUL', 'SPC/SUL', 'SPC/SUL'],
+            'HUB': ['HUB-LMS-04', 'HUB-LPB-02', 'HUB-LMA-02', 'HUB-LPR-18', 'HUB-LMG-38', 'HUB-LES-03', 'HUB-LPE-06', 'HUB-LMG-21', 
+                    'HUB-LSP-26', 'HUB-LMG-43', 'HUB-LSP-35', 'HUB-LSP-73', 'HUB-LES-07', 'HUB-LRJ-21', 'HUB-LES-09', 'HUB-LSP-100',
+                    'HUB-LES-10', 'HUB-LMG-23', 'HUB-LPE-11', 'HUB-LSP-63', 'HUB-LRJ-27', 'HUB-LMG-38', 'HUB-LAL-03', 'HUB-LMT-02',
+                    'HUB-LSP-97', 'HUB-LSC-13', 'HUB-LRJ-03', 'HUB-LSP-10', 'HUB-LSP-88', 'HUB-LSP-38', 'HUB-LSP-82', 'HUB-LDF-03', 'HUB-LSE-03'],
+            'EM ATRIBUICAO': [3, 2, 4, 4, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 3, 5, 4, 4, 5, 5, 2, 4, 4, 5, 3, 2, 4, 4, 5, 3, 2],
+            'AG. CHEGADA': [6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6],
+            'AG. CARREG.': [89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89, 89],
+            'CARREGANDO': [23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23, 23],
+            'CARREGADOS': [12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12, 12],
+            'AG. DESCARGA': [56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56, 56],
+            'NO SHOW': [1, 2, 1, 2, 3, 5, 9, 1, 2, 6, 4, 5, 8, 6, 1, 2, 10, 15, 1, 2, 3, 5, 10, 15, 1, 2, 3, 5, 9, 1, 2, 4, 4],
+            '%NS': ['0.01%', '0.10%', '0.15%', '0.20%', '0.21%', '0.25%', '0.30%', '0.45%', '0.01%', '0.10%', '0.15%', '0.20%', '0.21%', '0.25%', '0.30%', 
+                    '0.45%', '0.01%', '0.10%', '0.15%', '0.01%', '0.10%', '0.15%', '0.20%', '0.21%', '0.25%', '0.01%', '0.10%', '0.15%', '0.20%', '0.21%', '0.25%', '0.01%', '0.10%'],
+            'INFRUT.': [10, 15, 1, 2, 3, 5, 9, 1, 2, 6, 4, 5, 8, 6, 1, 2, 10, 15, 1, 2, 3, 5, 10, 15, 1, 2, 3, 5, 9, 1, 2, 4, 4],
+            '% INFRUT.': [0.50, 1.00, 0.75, 0.25, 1.00, 0.00, 0.30, 0.01, 0.10, 0.15, 0.20, 0.21, 0.25, 0.30, 0.45, 0.02, 0.50, 0.50, 0.50, 0.50, 0.50, 0.50, 1.00, 1.00, 0.75, 0.25, 1.00, 0.00, 0.30, 0.01, 0.10, 0.15, 0.20],
+            'CANCELADO': [50, 25, 35, 20, 40, 29, 24, 22, 19, 17, 14, 12, 9, 7, 4, 2, -1, -4, -6, -9, -11, -14, -16, -19, -21, -24, -26, -29, -31, -34, -36, -39, -41],
+            '%CANCELADO': [0.25, 1.60, 0.75, 1.33, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.58, 1.83, 1.93, 1.93, 1.98, 2.02, 2.07, 2.12, 2.17, 2.22, 2.28, 2.31, 2.41, 2.45, 2.60, 2.65, 2.80, 2.80],
+            'FECHADAS': [2500, 6000, 5000, 7000, 8250, 9500, 10750, 12000, 13250, 14500, 15750, 17000, 18250, 19500, 20750, 1, 17750, 18515, 19280, 20044, 20809, 21574, 22339, 23103, 23868, 24633, 25397, 26162, 26927, 27692, 28456, 29221, 29986],
+            '%ETA ORIGEM': [99.00, 98.00, 95.00, 93.33, 91.33, 89.33, 87.33, 85.33, 83.33, 81.33, 79.33, 77.33, 75.33, 73.33, 71.33, 69.33, 87.33, 85.33, 83.33, 81.33, 69.33, 67.33, 65.33, 53.33, 51.33, 49.33, 47.33, 45.33, 43.33, 41.33, 39.33, 37.33, 35.33],
+            '%CPT': [96, 83, 93, 70, 91, 80, 78, 76, 74, 72, 70, 67, 65, 63, 61, 59, 57, 55, 53, 51, 49, 48, 44, 42, 40, 38, 36, 34, 30, 28, 26, 25, 23],
+            '%ETA DESTINO': [97, 95, 94, 93, 95, 93, 92, 90, 91, 91, 90, 90, 89, 89, 88, 87, 86, 89, 85, 85, 84, 83, 83, 83, 82, 81, 80, 79, 79, 79, 77, 77, 77],
+            '%SPOT': [-7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50, -7.50],
+            'SPOT PEND.': [10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10]
+        })
+
+
+    # ============================================
+    # CARREGAR DADOS
+    # ============================================
+
+    # Status da fonte de dados
+    data_source = "Dados de exemplo (configure GOOGLE_SHEET_ID para usar dados reais)"
+    using_real_data = False
+    stale_warning = ""
+    failed_warning = ""
+
+    if SHEET_SOURCES:
+        loaded = load_sources(
+            SHEET_SOURCES,
+            load_sheet_data,
+            {'SOC': SHEET_NAME_SOC, 'HUB': SHEET_NAME_HUB},
+            max_workers=SHEET_MAX_WORKERS,
+            initializer=_streamlit_thread_initializer()
+        )
+        df_soc = loaded['frames']['SOC']
+        df_hub = loaded['frames']['HUB']
+    
+        if not df_soc.empty and not df_hub.empty:
+            if len(SHEET_SOURCES) > 1:
+                data_source = f"Google Sheets ({len(SHEET_SOURCES)} planilhas)"
+            else:
+                data_source = f"Google Sheets (ID: {SHEET_SOURCES[0]['sheet_id'][:20]}...)"
+            using_real_data = True
+        
+            if loaded['stale']:
+                oldest = min(saved_at for _, _, saved_at in loaded['stale'])
+                stale_tabs = ", ".join(f"{name} {kind}".strip() for name, kind, _ in loaded['stale'])
+                stale_warning = (
+                    f"⚠️ Google Sheets indisponivel: exibindo ultimo dado valido de "
+                    f"{oldest.strftime('%d/%m %H:%M')} ({format_age(oldest)} atras) - {stale_tabs}"
+                )
+                data_source += f" | snapshot de {oldest.strftime('%d/%m %H:%M')}"
+        
+            # Fonte que falhou sem snapshot fica de fora das tabelas: avisa em vez de omitir calado
+            if loaded['failed']:
+                failed_tabs = ", ".join(f"{name} {kind}".strip() for name, kind in loaded['failed'])
+                failed_warning = f"❌ Sem dados (falha e sem snapshot): {failed_tabs} - tabelas incompletas"
+                data_source += f" | sem dados: {failed_tabs}"
+        else:
+            df_soc = get_sample_data_soc()
+            df_hub = get_sample_data_hub()
+            data_source = "Dados de exemplo (erro ao carregar do Sheets)"
     else:
         df_soc = get_sample_data_soc()
         df_hub = get_sample_data_hub()
-        data_source = "Dados de exemplo (erro ao carregar do Sheets)"
-else:
-    df_soc = get_sample_data_soc()
-    df_hub = get_sample_data_hub()
-
 
-# ============================================
-# DADOS REPORT AUTOMATICO
-# ============================================
-
-report_data = [
-    {'soc': 'SOC-MG2', 'data': datetime.now().strftime('%d/%m/%Y'), 'horario': datetime.now().strftime('%Hh'), 'programadas': 108, 'fechadas': 92,
-     'abertas': {'EM ATRIBUICAO': (23, 21.30), 'AGUARDANDO CHEGADA': (4, 3.70), 'AGUARDANDO CARREGAMENTO': (8, 7.41),
-                 'CARREGANDO': (23, 21.30), 'EM TRANSITO': (40, 37.04), 'AGUARDANDO DESCARGA': (10, 9.26)},
-     'performance': {'CANCELADAS': (2, 98.00), 'NO SHOW': (1, 98.50), 'INFRUTIFERAS': (1, 99.00),
-                     'ETA ORIGEM': (1, 99.00), 'CPT ORIGEM': (14, 85.00), 'SPOT': (55, 40.00), 'TENDENCIA': (37, 60.00)}},
-    {'soc': 'SOC-RJ1', 'data': datetime.now().strftime('%d/%m/%Y'), 'horario': datetime.now().strftime('%Hh'), 'programadas': 108, 'fechadas': 92,
-     'abertas': {'EM ATRIBUICAO': (23, 21.30), 'AGUARDANDO CHEGADA': (4, 3.70), 'AGUARDANDO CARREGAMENTO': (8, 7.41),
-                 'CARREGANDO': (23, 21.30), 'EM TRANSITO': (40, 37.04), 'AGUARDANDO DESCARGA': (10, 9.26)},
-     'performance': {'CANCELADAS': (2, 98.00), 'NO SHOW': (1, 98.50), 'INFRUTIFERAS': (1, 99.00),
-                     'ETA ORIGEM': (1, 99.00), 'CPT ORIGEM': (14, 85.00), 'SPOT': (55, 40.00), 'TENDENCIA': (37, 60.00)}},
-    {'soc': 'SOC-RJ2', 'data': datetime.now().strftime('%d/%m/%Y'), 'horario': datetime.now().strftime('%Hh'), 'programadas': 108, 'fechadas': 92,
-     'abertas': {'EM ATRIBUICAO': (23, 21.30), 'AGUARDANDO CHEGADA': (4, 3.70), 'AGUARDANDO CARREGAMENTO': (8, 7.41),
-                 'CARREGANDO': (23, 21.30), 'EM TRANSITO': (40, 37.04), 'AGUARDANDO DESCARGA': (10, 9.26)},
-     'performance': {'CANCELADAS': (2, 98.00), 'NO SHOW': (1, 98.50), 'INFRUTIFERAS': (1, 99.00),
-                     'ETA ORIGEM': (1, 99.00), 'CPT ORIGEM': (14, 85.00), 'SPOT': (55, 40.00), 'TENDENCIA': (37, 60.00)}},
-    {'soc': 'SOC-GO1', 'data': datetime.now().strftime('%d/%m/%Y'), 'horario': datetime.now().strftime('%Hh'), 'programadas': 108, 'fechadas': 92,
-     'abertas': {'EM ATRIBUICAO': (23, 21.30), 'AGUARDANDO CHEGADA': (4, 3.70), 'AGUARDANDO CARREGAMENTO': (8, 7.41),
-                 'CARREGANDO': (23, 21.30), 'EM TRANSITO': (40, 37.04), 'AGUARDANDO DESCARGA': (10, 9.26)},
-     'performance': {'CANCELADAS': (2, 98.00), 'NO SHOW': (1, 98.50), 'INFRUTIFERAS': (1, 99.00),
-                     'ETA ORIGEM': (1, 99.00), 'CPT ORIGEM': (14, 85.00), 'SPOT': (55, 40.00), 'TENDENCIA': (37, 60.00)}},
-    {'soc': 'SOC-RS1', 'data': datetime.now().strftime('%d/%m/%Y'), 'horario': datetime.now().strftime('%Hh'), 'programadas': 108, 'fechadas': 92,
-     'abertas': {'EM ATRIBUICAO': (23, 21.30), 'AGUARDANDO CHEGADA': (4, 3.70), 'AGUARDANDO CARREGAMENTO': (8, 7.41),
-                 'CARREGANDO': (23, 21.30), 'EM TRANSITO': (40, 37.04), 'AGUARDANDO DESCARGA': (10, 9.26)},
-     'performance': {'CANCELADAS': (2, 98.00), 'NO SHOW': (1, 98.50), 'INFRUTIFERAS': (1, 99.00),
-                     'ETA ORIGEM': (1, 99.00), 'CPT ORIGEM': (14, 85.00), 'SPOT': (55, 40.00), 'TENDENCIA': (37, 60.00)}},
-    {'soc': 'SOC-SP8', 'data': datetime.now().strftime('%d/%m/%Y'), 'horario': datetime.now().strftime('%Hh'), 'programadas': 108, 'fechadas': 92,
-     'abertas': {'EM ATRIBUICAO': (23, 21.30), 'AGUARDANDO CHEGADA': (4, 3.70), 'AGUARDANDO CARREGAMENTO': (8, 7.41),
-                 'CARREGANDO': (23, 21.30), 'EM TRANSITO': (40, 37.04), 'AGUARDANDO DESCARGA': (10, 9.26)},
-     'performance': {'CANCELADAS': (2, 98.00), 'NO SHOW': (1, 98.50), 'INFRUTIFERAS': (1, 99.00),
-                     'ETA ORIGEM': (1, 99.00), 'CPT ORIGEM': (14, 85.00), 'SPOT': (55, 40.00), 'TENDENCIA': (37, 60.00)}},
-]
-
-
-# ============================================
-# FUNCOES DE CORES
-# ============================================
-
-def color_infrut(val):
-    try:
-        v = float(val)
-        if v >= 1.0:
-            return 'background-color: #ffcdd2; color: #c62828;'
-        elif v >= 0.5:
-            return 'background-color: #ffe0b2; color: #e65100;'
-        elif v >= 0.25:
-            return 'background-color: #fff9c4; color: #f57f17;'
-        else:
-            return 'background-color: #c8e6c9; color: #2e7d32;'
-    except:
-        return ''
-
-def color_eta(val):
-    try:
-        v = float(val)
-        if v >= 95:
-            return 'background-color: #81c784; color: #1b5e20;'
-        elif v >= 85:
-            return 'background-color: #c8e6c9; color: #2e7d32;'
-        elif v >= 75:
-            return 'background-color: #fff9c4; color: #f57f17;'
-        elif v >= 60:
-            return 'background-color: #ffe0b2; color: #e65100;'
-        else:
-            return 'background-color: #ffcdd2; color: #c62828;'
-    except:
-        return ''
-
-def color_cancelado(val):
-    try:
-        v = float(val)
-        if v <= 0.5:
-            return 'background-color: #81c784; color: #1b5e20;'
-        elif v <= 1.0:
-            return 'background-color: #c8e6c9; color: #2e7d32;'
-        elif v <= 1.5:
-            return 'background-color: #fff9c4; color: #f57f17;'
-        elif v <= 2.0:
-            return 'background-color: #ffe0b2; color: #e65100;'
-        else:
-            return 'background-color: #ffcdd2; color: #c62828;'
-    except:
-        return ''
-
-def render_card_header(data):
-    """Renderiza o cabecalho do card"""
-    return f'''
+    # So dado real e atual entra no historico (snapshot antigo nao)
+    if using_real_data and not stale_warning:
+        get_history_store().record('SOC', df_soc)
+        get_history_store().record('HUB', df_hub)
+
+
+    # ============================================
+    # DADOS REPORT AUTOMATICO
+    # ============================================
+
+    report_data = [
+        {'soc': 'SOC-MG2', 'data': datetime.now().strftime('%d/%m/%Y'), 'horario': datetime.now().strftime('%Hh'), 'programadas': 108, 'fechadas': 92,
+         'abertas': {'EM ATRIBUICAO': (23, 21.30), 'AGUARDANDO CHEGADA': (4, 3.70), 'AGUARDANDO CARREGAMENTO': (8, 7.41),
+                     'CARREGANDO': (23, 21.30), 'EM TRANSITO': (40, 37.04), 'AGUARDANDO DESCARGA': (10, 9.26)},
+         'performance': {'CANCELADAS': (2, 98.00), 'NO SHOW': (1, 98.50), 'INFRUTIFERAS': (1, 99.00),
+                         'ETA ORIGEM': (1, 99.00), 'CPT ORIGEM': (14, 85.00), 'SPOT': (55, 40.00), 'TENDENCIA': (37, 60.00)}},
+        {'soc': 'SOC-RJ1', 'data': datetime.now().strftime('%d/%m/%Y'), 'horario': datetime.now().strftime('%Hh'), 'programadas': 108, 'fechadas': 92,
+         'abertas': {'EM ATRIBUICAO': (23, 21.30), 'AGUARDANDO CHEGADA': (4, 3.70), 'AGUARDANDO CARREGAMENTO': (8, 7.41),
+                     'CARREGANDO': (23, 21.30), 'EM TRANSITO': (40, 37.04), 'AGUARDANDO DESCARGA': (10, 9.26)},
+         'performance': {'CANCELADAS': (2, 98.00), 'NO SHOW': (1, 98.50), 'INFRUTIFERAS': (1, 99.00),
+                         'ETA ORIGEM': (1, 99.00), 'CPT ORIGEM': (14, 85.00), 'SPOT': (55, 40.00), 'TENDENCIA': (37, 60.00)}},
+        {'soc': 'SOC-RJ2', 'data': datetime.now().strftime('%d/%m/%Y'), 'horario': datetime.now().strftime('%Hh'), 'programadas': 108, 'fechadas': 92,
+         'abertas': {'EM ATRIBUICAO': (23, 21.30), 'AGUARDANDO CHEGADA': (4, 3.70), 'AGUARDANDO CARREGAMENTO': (8, 7.41),
+                     'CARREGANDO': (23, 21.30), 'EM TRANSITO': (40, 37.04), 'AGUARDANDO DESCARGA': (10, 9.26)},
+         'performance': {'CANCELADAS': (2, 98.00), 'NO SHOW': (1, 98.50), 'INFRUTIFERAS': (1, 99.00),
+                         'ETA ORIGEM': (1, 99.00), 'CPT ORIGEM': (14, 85.00), 'SPOT': (55, 40.00), 'TENDENCIA': (37, 60.00)}},
+        {'soc': 'SOC-GO1', 'data': datetime.now().strftime('%d/%m/%Y'), 'horario': datetime.now().strftime('%Hh'), 'programadas': 108, 'fechadas': 92,
+         'abertas': {'EM ATRIBUICAO': (23, 21.30), 'AGUARDANDO CHEGADA': (4, 3.70), 'AGUARDANDO CARREGAMENTO': (8, 7.41),
+                     'CARREGANDO': (23, 21.30), 'EM TRANSITO': (40, 37.04), 'AGUARDANDO DESCARGA': (10, 9.26)},
+         'performance': {'CANCELADAS': (2, 98.00), 'NO SHOW': (1, 98.50), 'INFRUTIFERAS': (1, 99.00),
+                         'ETA ORIGEM': (1, 99.00), 'CPT ORIGEM': (14, 85.00), 'SPOT': (55, 40.00), 'TENDENCIA': (37, 60.00)}},
+        {'soc': 'SOC-RS1', 'data': datetime.now().strftime('%d/%m/%Y'), 'horario': datetime.now().strftime('%Hh'), 'programadas': 108, 'fechadas': 92,
+         'abertas': {'EM ATRIBUICAO': (23, 21.30), 'AGUARDANDO CHEGADA': (4, 3.70), 'AGUARDANDO CARREGAMENTO': (8, 7.41),
+                     'CARREGANDO': (23, 21.30), 'EM TRANSITO': (40, 37.04), 'AGUARDANDO DESCARGA': (10, 9.26)},
+         'performance': {'CANCELADAS': (2, 98.00), 'NO SHOW': (1, 98.50), 'INFRUTIFERAS': (1, 99.00),
+                         'ETA ORIGEM': (1, 99.00), 'CPT ORIGEM': (14, 85.00), 'SPOT': (55, 40.00), 'TENDENCIA': (37, 60.00)}},
+        {'soc': 'SOC-SP8', 'data': datetime.now().strftime('%d/%m/%Y'), 'horario': datetime.now().strftime('%Hh'), 'programadas': 108, 'fechadas': 92,
+         'abertas': {'EM ATRIBUICAO': (23, 21.30), 'AGUARDANDO CHEGADA': (4, 3.70), 'AGUARDANDO CARREGAMENTO': (8, 7.41),
+                     'CARREGANDO': (23, 21.30), 'EM TRANSITO': (40, 37.04), 'AGUARDANDO DESCARGA': (10, 9.26)},
+         'performance': {'CANCELADAS': (2, 98.00), 'NO SHOW': (1, 98.50), 'INFRUTIFERAS': (1, 99.00),
+                         'ETA ORIGEM': (1, 99.00), 'CPT ORIGEM': (14, 85.00), 'SPOT': (55, 40.00), 'TENDENCIA': (37, 60.00)}},
+    ]
+
+    # Publica o que esta sendo exibido para a API de snapshot (dado de exemplo nao)
+    if using_real_data:
+        publish_snapshot(get_snapshot_store(), df_soc, df_hub, report_data, {
+            'data_source': data_source,
+            'stale': bool(stale_warning),
+            'stale_warning': stale_warning,
+            'failed_warning': failed_warning,
+        }, report_is_sample=True)  # Cards do Report ainda sao fixos
+    if SNAPSHOT_API:
+        start_snapshot_api()
+
+
+    # ============================================
+    # FUNCOES DE CORES
+    # ============================================
+
+    def color_infrut(val):
+        return band_css(val, BANDS['infrut'])
+
+    def color_eta(val):
+        return band_css(val, BANDS['eta'])
+
+    def color_cancelado(val):
+        return band_css(val, BANDS['cancelado'])
+
+    def render_card_header(data):
+        """Renderiza o cabecalho do card"""
+        return f'''
 <div style="border: 2px solid #FF6B35; border-radius: 5px 5px 0 0; font-size: 0.75rem; margin: 0;">
     <div style="background: #fff3e0; padding: 5px 8px;">
         <div style="display: flex; justify-content: space-between;"><span style="color: #666;">OPERACAO:</span><span style="color: #FF6B35; font-weight: bold;">{data['soc']}</span></div>
@@ -472,141 +607,207 @@ def render_card_header(data):
 </div>
 '''
 
-def render_section_title(title):
-    """Renderiza titulo de secao"""
-    return f'<div style="background: #FF6B35; color: white; padding: 4px 8px; text-align: center; font-size: 0.7rem; font-weight: bold; margin: 0; border-left: 2px solid #FF6B35; border-right: 2px solid #FF6B35;">{title}</div>'
+    def render_section_title(title):
+        """Renderiza titulo de secao"""
+        return f'<div style="background: #FF6B35; color: white; padding: 4px 8px; text-align: center; font-size: 0.7rem; font-weight: bold; margin: 0; border-left: 2px solid #FF6B35; border-right: 2px solid #FF6B35;">{title}</div>'
 
-def create_abertas_df(data):
-    """Cria DataFrame para secao ABERTAS"""
-    rows = []
-    for label, (valor, pct) in data['abertas'].items():
-        rows.append({'Status': label, 'Qtd': valor, '%': f'{pct:.2f}%'})
-    total = sum([v[0] for v in data['abertas'].values()])
-    rows.append({'Status': 'TOTAL', 'Qtd': total, '%': ''})
-    return pd.DataFrame(rows)
+    def create_abertas_df(data):
+        """Cria DataFrame para secao ABERTAS"""
+        rows = []
+        for label, (valor, pct) in data['abertas'].items():
+            rows.append({'Status': label, 'Qtd': valor, '%': f'{pct:.2f}%'})
+        total = sum([v[0] for v in data['abertas'].values()])
+        rows.append({'Status': 'TOTAL', 'Qtd': total, '%': ''})
+        return pd.DataFrame(rows)
 
-def create_performance_df(data):
-    """Cria DataFrame para secao PERFORMANCE"""
-    rows = []
-    for label, (valor, pct) in data['performance'].items():
-        rows.append({'Indicador': label, 'Qtd': valor, '%': f'{pct:.2f}%'})
-    return pd.DataFrame(rows)
+    def create_performance_df(data):
+        """Cria DataFrame para secao PERFORMANCE"""
+        rows = []
+        for label, (valor, pct) in data['performance'].items():
+            rows.append({'Indicador': label, 'Qtd': valor, '%': f'{pct:.2f}%'})
+        return pd.DataFrame(rows)
 
 
-# ============================================
-# HEADER
-# ============================================
+    # ============================================
+    # HEADER
+    # ============================================
 
-st.markdown(f"""
+    st.markdown(f"""
 <div class="main-header">
     <h1>📊 Performance 3PL - SOC / HUB</h1>
 </div>
 """, unsafe_allow_html=True)
 
-# Info da fonte de dados (removido para screenshot limpo)
-# st.markdown(f'<div class="data-source-info">📁 Fonte: {data_source}</div>', unsafe_allow_html=True)
-
-# ============================================
-# ABAS
-# ============================================
-
-tab1, tab2 = st.tabs(["📋 Tabelas SOC/HUB", "📊 Report Automatico"])
-
-# ============================================
-# ABA 1: TABELAS SOC/HUB
-# ============================================
-
-with tab1:
-    st.markdown('<div class="section-header">📍 Por SOC</div>', unsafe_allow_html=True)
-    
-    styled_soc = df_soc.style.map(
-        color_infrut, subset=['% INFRUT.']
-    ).map(
-        color_eta, subset=['%ETA ORIGEM', '%CPT', '%ETA DESTINO']
-    ).map(
-        color_cancelado, subset=['%CANCELADO']
-    ).format({
-        '% INFRUT.': '{:.2f}%',
-        'CANCELADO': '{:.0f}',
-        '%CANCELADO': '{:.2f}%',
-        '%ETA ORIGEM': '{:.2f}%',
-        '%CPT': '{:.0f}%',
-        '%ETA DESTINO': '{:.0f}%',
-        '%SPOT': '{:.2f}%'
-    }).set_properties(**{'text-align': 'center'})
-    
-    st.dataframe(
-        styled_soc,
-        use_container_width=True,
-        hide_index=True,
-        height=280
-    )
-    
-    st.markdown('<div class="section-header">🏢 Por HUB</div>', unsafe_allow_html=True)
-    
-    styled_hub = df_hub.style.map(
-        color_infrut, subset=['% INFRUT.']
-    ).map(
-        color_eta, subset=['%ETA ORIGEM', '%CPT', '%ETA DESTINO']
-    ).map(
-        color_cancelado, subset=['%CANCELADO']
-    ).format({
-        '% INFRUT.': '{:.2f}%',
-        'CANCELADO': '{:.0f}',
-        '%CANCELADO': '{:.2f}%',
-        '%ETA ORIGEM': '{:.2f}%',
-        '%CPT': '{:.0f}%',
-        '%ETA DESTINO': '{:.0f}%',
-        '%SPOT': '{:.2f}%'
-    }).set_properties(**{'text-align': 'center'})
-    
-    st.dataframe(
-        styled_hub,
-        use_container_width=True,
-        hide_index=True,
-        height=450
-    )
-
-# ============================================
-# ABA 2: REPORT AUTOMATICO
-# ============================================
-
-with tab2:
-    st.markdown('<div class="report-title">Report Automatico - 1h a 1h</div>', unsafe_allow_html=True)
-    
-    # Primeira linha - 3 cards
-    cols1 = st.columns(3)
-    for i, col in enumerate(cols1):
-        if i < len(report_data):
-            with col:
-                with st.container():
-                    st.markdown(render_card_header(report_data[i]), unsafe_allow_html=True)
-                    st.markdown(render_section_title('ABERTAS'), unsafe_allow_html=True)
-                    st.dataframe(create_abertas_df(report_data[i]), hide_index=True, use_container_width=True, height=180)
-                    st.markdown(render_section_title('PERFORMANCE'), unsafe_allow_html=True)
-                    st.dataframe(create_performance_df(report_data[i]), hide_index=True, use_container_width=True, height=180)
-    
-    st.markdown('<div class="report-title">Report Automatico - 1h a 1h</div>', unsafe_allow_html=True)
-    
-    # Segunda linha - 3 cards
-    cols2 = st.columns(3)
-    for i, col in enumerate(cols2):
-        idx = i + 3
-        if idx < len(report_data):
-            with col:
-                with st.container():
-                    st.markdown(render_card_header(report_data[idx]), unsafe_allow_html=True)
-                    st.markdown(render_section_title('ABERTAS'), unsafe_allow_html=True)
-                    st.dataframe(create_abertas_df(report_data[idx]), hide_index=True, use_container_width=True, height=180)
-                    st.markdown(render_section_title('PERFORMANCE'), unsafe_allow_html=True)
-                    st.dataframe(create_performance_df(report_data[idx]), hide_index=True, use_container_width=True, height=180)
-
-# ============================================
-# RODAPE
-# ============================================
-
-st.markdown(f"""
+    # Info da fonte de dados (removido para screenshot limpo)
+    # st.markdown(f'<div class="data-source-info">📁 Fonte: {data_source}</div>', unsafe_allow_html=True)
+
+    # Dados de snapshot ficam sinalizados (inclusive no screenshot)
+    if stale_warning:
+        st.markdown(f'<div class="error-box">{stale_warning}</div>', unsafe_allow_html=True)
+    if failed_warning:
+        st.markdown(f'<div class="error-box">{failed_warning}</div>', unsafe_allow_html=True)
+
+    # ============================================
+    # ABAS
+    # ============================================
+
+    tab1, tab2, tab3, tab4 = st.tabs(["📋 Tabelas SOC/HUB", "📊 Report Automatico", "🚨 Piores", "📈 Tendencias"])
+
+    # ============================================
+    # ABA 1: TABELAS SOC/HUB
+    # ============================================
+
+    with tab1:
+        st.markdown('<div class="section-header">📍 Por SOC</div>', unsafe_allow_html=True)
+    
+        styled_soc = df_soc.style.map(
+            color_infrut, subset=['% INFRUT.']
+        ).map(
+            color_eta, subset=['%ETA ORIGEM', '%CPT', '%ETA DESTINO']
+        ).map(
+            color_cancelado, subset=['%CANCELADO']
+        ).format(
+            {c: f for c, f in COLUMN_FORMATS.items() if c in df_soc.columns}
+        ).set_properties(**{'text-align': 'center'})
+    
+        st.dataframe(
+            styled_soc,
+            use_container_width=True,
+            hide_index=True,
+            height=280
+        )
+    
+        st.markdown('<div class="section-header">🏢 Por HUB</div>', unsafe_allow_html=True)
+    
+        styled_hub = df_hub.style.map(
+            color_infrut, subset=['% INFRUT.']
+        ).map(
+            color_eta, subset=['%ETA ORIGEM', '%CPT', '%ETA DESTINO']
+        ).map(
+            color_cancelado, subset=['%CANCELADO']
+        ).format(
+            {c: f for c, f in COLUMN_FORMATS.items() if c in df_hub.columns}
+        ).set_properties(**{'text-align': 'center'})
+    
+        st.dataframe(
+            styled_hub,
+            use_container_width=True,
+            hide_index=True,
+            height=450
+        )
+
+    # ============================================
+    # ABA 2: REPORT AUTOMATICO
+    # ============================================
+
+    with tab2:
+        st.markdown('<div class="report-title">Report Automatico - 1h a 1h</div>', unsafe_allow_html=True)
+    
+        # Primeira linha - 3 cards
+        cols1 = st.columns(3)
+        for i, col in enumerate(cols1):
+            if i < len(report_data):
+                with col:
+                    with st.container():
+                        st.markdown(render_card_header(report_data[i]), unsafe_allow_html=True)
+                        st.markdown(render_section_title('ABERTAS'), unsafe_allow_html=True)
+                        st.dataframe(create_abertas_df(report_data[i]), hide_index=True, use_container_width=True, height=180)
+                        st.markdown(render_section_title('PERFORMANCE'), unsafe_allow_html=True)
+                        st.dataframe(create_performance_df(report_data[i]), hide_index=True, use_container_width=True, height=180)
+    
+        st.markdown('<div class="report-title">Report Automatico - 1h a 1h</div>', unsafe_allow_html=True)
+    
+        # Segunda linha - 3 cards
+        cols2 = st.columns(3)
+        for i, col in enumerate(cols2):
+            idx = i + 3
+            if idx < len(report_data):
+                with col:
+                    with st.container():
+                        st.markdown(render_card_header(report_data[idx]), unsafe_allow_html=True)
+                        st.markdown(render_section_title('ABERTAS'), unsafe_allow_html=True)
+                        st.dataframe(create_abertas_df(report_data[idx]), hide_index=True, use_container_width=True, height=180)
+                        st.markdown(render_section_title('PERFORMANCE'), unsafe_allow_html=True)
+                        st.dataframe(create_performance_df(report_data[idx]), hide_index=True, use_container_width=True, height=180)
+
+    # ============================================
+    # ABA 3: PIORES OPERACOES
+    # ============================================
+
+    def style_worst(df: pd.DataFrame):
+        """Mesmas cores/formatos das tabelas SOC/HUB, so nas colunas presentes"""
+        styled = df.style
+        if '% INFRUT.' in df.columns:
+            styled = styled.map(color_infrut, subset=['% INFRUT.'])
+        eta_cols = [c for c in ['%ETA ORIGEM', '%CPT', '%ETA DESTINO'] if c in df.columns]
+        if eta_cols:
+            styled = styled.map(color_eta, subset=eta_cols)
+        if '%CANCELADO' in df.columns:
+            styled = styled.map(color_cancelado, subset=['%CANCELADO'])
+        formats = {c: f for c, f in COLUMN_FORMATS.items() if c in df.columns}
+        formats['SCORE'] = '{:.1f}'
+        return styled.format(formats).set_properties(**{'text-align': 'center'})
+
+
+    with tab3:
+        for kind, df_kind, icon in (('SOC', df_soc, '📍'), ('HUB', df_hub, '🏢')):
+            # Calculado por sessao sobre os dados dela (score vetorizado, O(N))
+            worst = worst_operations(df_kind, WORST_WEIGHTS, WORST_N)
+            columns = [c for c in ['POS', 'SCORE', 'REGIONAL', SOURCE_COLUMN, kind, *WORST_WEIGHTS] if c in worst.columns]
+        
+            st.markdown(f'<div class="section-header">{icon} {len(worst)} piores {kind}</div>', unsafe_allow_html=True)
+            st.dataframe(
+                style_worst(worst[columns]),
+                use_container_width=True,
+                hide_index=True,
+                # Altura para caber todas as linhas sem rolagem (screenshot completo)
+                height=38 + 35 * len(worst)
+            )
+
+    # ============================================
+    # ABA 4: TENDENCIAS
+    # ============================================
+
+    with tab4:
+        st.markdown('<div class="section-header">📈 Tendencias</div>', unsafe_allow_html=True)
+    
+        col_kind, col_metric, col_period, col_ops = st.columns([1, 1, 1.4, 3])
+        trend_kind = col_kind.radio("Tipo", ["SOC", "HUB"], horizontal=True, key="trend_kind")
+        trend_metric = col_metric.selectbox("Indicador", TREND_METRICS, key="trend_metric")
+        trend_period = col_period.radio("Periodo", ["Hoje", "7 dias", "30 dias"], horizontal=True, key="trend_period")
+    
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        trend_since = {
+            "Hoje": today,
+            "7 dias": today - timedelta(days=6),
+            "30 dias": today - timedelta(days=29),
+        }[trend_period]
+        trend_history = load_trend_history(trend_kind, trend_since)
+    
+        if trend_history.empty:
+            st.info("Ainda nao ha historico: os pontos sao gravados a cada carga de dados reais do Google Sheets.")
+        else:
+            trend_operations = col_ops.multiselect(
+                "Operacoes (vazio = media geral)",
+                sorted(trend_history['OPERACAO'].unique()),
+                max_selections=20,
+                key="trend_operations"
+            )
+            st.plotly_chart(
+                trend_figure(trend_history, trend_metric, trend_operations, TREND_POINT_BUDGET),
+                use_container_width=True
+            )
+
+    # ============================================
+    # RODAPE
+    # ============================================
+
+    st.markdown(f"""
 <div style="text-align: center; color: #999; font-size: 0.7rem; margin-top: 5px;">
     Atualizado em: {datetime.now().strftime('%d/%m/%Y %H:%M')} | Fonte: {data_source}
 </div>
 """, unsafe_allow_html=True)
+finally:
+    # Mesmo com excecao, st.stop() ou rerun: o cProfile e global no Python 3.12+
+    if _profiler is not None:
+        _profiler.stop()
@@ -4,14 +4,26 @@ Execute: python enviar_dashboard_seatalk.py
 
 IMPORTANTE: O dashboard deve estar rodando primeiro!
 Execute em outro terminal: streamlit run dashboard_performance.py
+
+Modo residente (agendador interno, mantem navegador aberto entre execucoes):
+    python enviar_dashboard_seatalk.py --agendar
 """
 
+import argparse
 import asyncio
 import os
-import base64
+import subprocess
+import sys
+from urllib.parse import urlsplit
 import requests
 from playwright.async_api import async_playwright
 
+from agendador import Scheduler
+from captura import capture_targets, load_targets, save_screenshots
+from envio_imagem import post_image
+from perfil_rede import load_profile
+from perfilamento import profile_run
+
 # ============================================
 # CONFIGURACOES
 # ============================================
@@ -35,182 +47,135 @@ HEADLESS = os.getenv("HEADLESS", "true").lower() == "true"
 VIEWPORT_WIDTH = 1920
 VIEWPORT_HEIGHT = 1080
 
+# Perfil de interceptacao de rede na captura: 'padrao', 'desligado' ou caminho de um JSON
+CAPTURE_NETWORK_PROFILE = os.getenv("CAPTURE_NETWORK_PROFILE", "padrao")
+
+# Se definido, grava o tempo de cada requisicao da captura neste arquivo JSON
+CAPTURE_TIMING_FILE = os.getenv("CAPTURE_TIMING_FILE", "")
+
+# Alvos da captura: vazio (3 abas padrao), lista JSON ou caminho de arquivo JSON
+# Ex: [{"key": "sul", "url": "http://host:8501/?regional=SUL", "tab": "Report"}]
+CAPTURE_TARGETS = os.getenv("CAPTURE_TARGETS", "")
+
+# Maximo de paginas capturando ao mesmo tempo (um unico navegador)
+CAPTURE_CONCURRENCY = int(os.getenv("CAPTURE_CONCURRENCY", "4"))
+
+# Pasta onde os screenshots sao gravados como <chave>.png, so como registro
+# (vazio = nao grava). Use uma pasta por processo: os nomes sao fixos
+SCREENSHOT_DIR = os.getenv("SCREENSHOT_DIR", "")
+
+# Modo agendador (--agendar): expressao cron no horario local do servidor
+SCHEDULE_CRON = os.getenv("SCHEDULE_CRON", "0 * * * *")
+
+# Atraso aleatorio maximo (segundos) somado a cada disparo
+SCHEDULE_JITTER = int(os.getenv("SCHEDULE_JITTER", "30"))
+
+# Se a execucao anterior ainda roda: 'skip' (ignora) ou 'queue' (enfileira)
+SCHEDULE_OVERLAP = os.getenv("SCHEDULE_OVERLAP", "skip")
+
+# Quantos horarios perdidos recuperar ao reiniciar (0 = nenhum)
+SCHEDULE_CATCHUP = int(os.getenv("SCHEDULE_CATCHUP", "1"))
+
+# Arquivo com o ultimo horario executado (para recuperar horarios perdidos)
+SCHEDULE_STATE_FILE = os.getenv("SCHEDULE_STATE_FILE", ".agendador_estado.json")
+
+# Se True, o agendador sobe o Streamlit uma unica vez e o mantem rodando
+START_STREAMLIT = os.getenv("START_STREAMLIT", "false").lower() == "true"
+
+# Dashboard iniciado pelo modo agendador (START_STREAMLIT), ao lado deste script
+DASHBOARD_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dashboard_performance.py")
+
+# Sessao HTTP reaproveitada entre envios (keep-alive com o SeaTalk)
+_http = requests.Session()
+
 
 # ============================================
 # FUNCOES
 # ============================================
 
-async def capture_both_tabs(
-    streamlit_url: str,
+async def capture_all(
+    targets: list,
     wait_time: int = 5,
-    headless: bool = True
-) -> tuple:
+    headless: bool = True,
+    browser=None
+) -> dict:
     """
-    Captura screenshots das duas abas do dashboard
+    Captura todos os alvos (ver captura.load_targets)
     
     Args:
-        streamlit_url: URL do dashboard Streamlit
+        targets: Lista de alvos (URL, aba, recorte, chave)
         wait_time: Tempo de espera para carregar (segundos)
         headless: Se True, executa sem abrir janela
+        browser: Navegador Playwright ja aberto (modo agendador). Se None,
+                 abre e fecha um navegador so para esta captura
     
     Returns:
-        tuple: (screenshot_tab1_bytes, screenshot_tab2_bytes)
+        dict: chave do alvo -> bytes do PNG
     """
+    kwargs = {
+        'wait_time': wait_time,
+        'concurrency': CAPTURE_CONCURRENCY,
+        'viewport': (VIEWPORT_WIDTH, VIEWPORT_HEIGHT),
+        'network_profile': load_profile(CAPTURE_NETWORK_PROFILE),
+        'timing_file': CAPTURE_TIMING_FILE,
+    }
+    
+    if browser is not None:
+        return await capture_targets(browser, targets, **kwargs)
+    
     async with async_playwright() as p:
         print("🌐 Iniciando navegador...")
         
         browser = await p.chromium.launch(headless=headless)
         
-        # Viewport grande para capturar dashboard completo em uma tela
-        context = await browser.new_context(
-            viewport={'width': VIEWPORT_WIDTH, 'height': VIEWPORT_HEIGHT},
-            device_scale_factor=1
-        )
-        page = await context.new_page()
-        
-        screenshots = []
-        
         try:
-            print(f"📊 Acessando dashboard: {streamlit_url}")
-            await page.goto(streamlit_url, wait_until='networkidle', timeout=60000)
-            
-            print(f"⏳ Aguardando {wait_time}s para dashboard carregar...")
-            await asyncio.sleep(wait_time)
-            
-            # Aguarda elementos do Streamlit
-            try:
-                await page.wait_for_selector('[data-testid="stAppViewContainer"]', timeout=10000)
-                print("✅ Dashboard carregado!")
-            except:
-                print("⚠️ Elementos do Streamlit nao detectados, continuando...")
-            
-            # ========================================
-            # CAPTURA ABA 1: Tabelas SOC/HUB
-            # ========================================
-            print()
-            print("=" * 50)
-            print("📋 Capturando ABA 1: Tabelas SOC/HUB")
-            print("=" * 50)
-            
-            # Clica na primeira aba
-            try:
-                tabs = await page.query_selector_all('button[data-baseweb="tab"]')
-                if len(tabs) >= 1:
-                    await tabs[0].click()
-                    print("✅ Clicou na aba 'Tabelas SOC/HUB'")
-                    await asyncio.sleep(2)
-            except Exception as e:
-                print(f"⚠️ Nao foi possivel clicar na aba 1: {e}")
-            
-            # Aguarda tabelas renderizarem
-            try:
-                await page.wait_for_selector('[data-testid="stDataFrame"]', timeout=5000)
-                print("✅ Tabelas carregadas!")
-            except:
-                print("⚠️ Aguardando tabelas renderizarem...")
-                await asyncio.sleep(2)
-            
-            # Scroll para o topo
-            await page.evaluate("window.scrollTo(0, 0)")
-            await asyncio.sleep(0.5)
-            
-            print("📸 Capturando screenshot da ABA 1...")
-            screenshot1 = await page.screenshot(
-                full_page=False,
-                type='png',
-                timeout=30000
-            )
-            screenshots.append(screenshot1)
-            print(f"✅ Screenshot ABA 1 capturado! Tamanho: {len(screenshot1)} bytes")
-            
-            # Salva screenshot 1
-            with open("dashboard_tab1_soc_hub.png", 'wb') as f:
-                f.write(screenshot1)
-            print("💾 Salvo: dashboard_tab1_soc_hub.png")
-            
-            # ========================================
-            # CAPTURA ABA 2: Report Automatico
-            # ========================================
-            print()
-            print("=" * 50)
-            print("📊 Capturando ABA 2: Report Automatico")
-            print("=" * 50)
-            
-            # Clica na segunda aba
-            try:
-                tabs = await page.query_selector_all('button[data-baseweb="tab"]')
-                if len(tabs) >= 2:
-                    await tabs[1].click()
-                    print("✅ Clicou na aba 'Report Automatico'")
-                    await asyncio.sleep(3)  # Mais tempo para carregar os cards
-            except Exception as e:
-                print(f"⚠️ Nao foi possivel clicar na aba 2: {e}")
-            
-            # Aguarda conteudo carregar
-            await asyncio.sleep(2)
-            
-            # Scroll para o topo
-            await page.evaluate("window.scrollTo(0, 0)")
-            await asyncio.sleep(0.5)
-            
-            print("📸 Capturando screenshot da ABA 2...")
-            screenshot2 = await page.screenshot(
-                full_page=False,
-                type='png',
-                timeout=30000
-            )
-            screenshots.append(screenshot2)
-            print(f"✅ Screenshot ABA 2 capturado! Tamanho: {len(screenshot2)} bytes")
-            
-            # Salva screenshot 2
-            with open("dashboard_tab2_report.png", 'wb') as f:
-                f.write(screenshot2)
-            print("💾 Salvo: dashboard_tab2_report.png")
-            
-            return tuple(screenshots)
-            
+            return await capture_targets(browser, targets, **kwargs)
         finally:
             await browser.close()
             print()
             print("🔒 Navegador fechado")
 
 
-def send_to_seatalk(image_data: bytes, webhook_url: str, description: str = "") -> dict:
+async def capture_both_tabs(
+    streamlit_url: str,
+    wait_time: int = 5,
+    headless: bool = True,
+    browser=None
+) -> tuple:
+    """
+    Captura screenshots das duas abas do dashboard (alvos padrao)
+    
+    Returns:
+        tuple: (screenshot_tab1_bytes, screenshot_tab2_bytes)
+    """
+    screenshots = await capture_all(
+        load_targets("", streamlit_url)[:2],
+        wait_time=wait_time,
+        headless=headless,
+        browser=browser
+    )
+    return tuple(screenshots.values())
+
+
+def send_to_seatalk(image_data, webhook_url: str, description: str = "") -> dict:
     """
     Envia imagem para o SeaTalk
     
+    O JSON com o base64 e gerado em streaming (envio_imagem.ImageBody), sem
+    copias da imagem inteira em memoria.
+    
     Args:
-        image_data: Dados binarios da imagem
+        image_data: bytes/memoryview da imagem ou caminho do arquivo PNG
         webhook_url: URL do webhook do SeaTalk
         description: Descricao para log
     
     Returns:
         dict: Resultado da operacao
     """
-    # Codifica em base64
-    image_base64 = base64.b64encode(image_data).decode('utf-8')
-    
-    # Prepara payload
-    payload = {
-        "tag": "image",
-        "image_base64": {
-            "content": image_base64
-        }
-    }
-    
-    headers = {
-        'Content-Type': 'application/json'
-    }
-    
     print(f"📤 Enviando {description}...")
     
     try:
-        response = requests.post(
-            webhook_url,
-            headers=headers,
-            json=payload,
-            timeout=60
-        )
+        response = post_image(_http, webhook_url, image_data, timeout=60)
         
         response.raise_for_status()
         result = response.json() if response.content else response.text
@@ -240,22 +205,29 @@ def send_to_seatalk(image_data: bytes, webhook_url: str, description: str = "")
         }
 
 
-async def main():
-    """Funcao principal"""
+async def run_once(browser=None):
+    """
+    Executa um ciclo completo: verifica dashboard, captura e envia para o SeaTalk
+    
+    Args:
+        browser: Navegador Playwright ja aberto (modo agendador) ou None
+    """
     print("=" * 70)
-    print("🚀 Dashboard Performance 3PL → SeaTalk (2 TELAS)")
+    print("🚀 Dashboard Performance 3PL → SeaTalk")
     print("=" * 70)
     print(f"📊 Dashboard URL: {STREAMLIT_URL}")
     print(f"🌐 Webhook URL: {WEBHOOK_URL[:50]}...")
     print(f"⏱️  Tempo de espera: {WAIT_TIME}s")
     print(f"👁️  Headless: {HEADLESS}")
     print(f"📐 Viewport: {VIEWPORT_WIDTH}x{VIEWPORT_HEIGHT}")
+    print(f"🗂️  Paginas em paralelo: {CAPTURE_CONCURRENCY}")
     print("=" * 70)
     print()
     
     # Verifica se o Streamlit esta rodando
     try:
-        response = requests.get(STREAMLIT_URL, timeout=5)
+        # Em thread: no modo agendador nao bloqueia o loop do Scheduler
+        response = await asyncio.to_thread(_http.get, STREAMLIT_URL, timeout=5)
         if response.status_code == 200:
             print("✅ Dashboard Streamlit esta acessivel!")
         else:
@@ -271,15 +243,22 @@ async def main():
     
     print()
     
-    # Captura screenshots das duas abas
+    targets = load_targets(CAPTURE_TARGETS, STREAMLIT_URL)
+    
+    # Captura todas as telas
     try:
-        screenshots = await capture_both_tabs(
-            streamlit_url=STREAMLIT_URL,
+        screenshots = await capture_all(
+            targets,
             wait_time=WAIT_TIME,
-            headless=HEADLESS
+            headless=HEADLESS,
+            browser=browser
         )
         
-        if screenshots and len(screenshots) == 2:
+        if screenshots:
+            # Disco so como registro: o envio usa sempre os bytes desta execucao,
+            # que outra execucao ao mesmo tempo nao consegue sobrescrever
+            saved_paths = save_screenshots(screenshots, SCREENSHOT_DIR) if SCREENSHOT_DIR else []
+            
             print()
             print("=" * 70)
             print("📤 ENVIANDO PARA SEATALK")
@@ -287,26 +266,18 @@ async def main():
             
             results = []
             
-            # Envia ABA 1
-            print()
-            result1 = send_to_seatalk(
-                image_data=screenshots[0],
-                webhook_url=WEBHOOK_URL,
-                description="ABA 1 - Tabelas SOC/HUB"
-            )
-            results.append(result1)
-            
-            # Pequena pausa entre envios
-            await asyncio.sleep(1)
-            
-            # Envia ABA 2
-            print()
-            result2 = send_to_seatalk(
-                image_data=screenshots[1],
-                webhook_url=WEBHOOK_URL,
-                description="ABA 2 - Report Automatico"
-            )
-            results.append(result2)
+            for i, target in enumerate(t for t in targets if t['key'] in screenshots):
+                # Pequena pausa entre envios
+                if i > 0:
+                    await asyncio.sleep(1)
+                
+                print()
+                results.append(await asyncio.to_thread(
+                    send_to_seatalk,
+                    image_data=memoryview(screenshots[target['key']]),
+                    webhook_url=WEBHOOK_URL,
+                    description=target['description']
+                ))
             
             # Resumo final
             print()
@@ -316,13 +287,14 @@ async def main():
             
             success_count = sum(1 for r in results if r.get('success'))
             
-            print(f"✅ Enviados com sucesso: {success_count}/2")
-            print()
-            print("📸 Screenshots salvos:")
-            print("   - dashboard_tab1_soc_hub.png")
-            print("   - dashboard_tab2_report.png")
+            print(f"✅ Enviados com sucesso: {success_count}/{len(targets)}")
+            if saved_paths:
+                print()
+                print("📸 Screenshots salvos:")
+                for path in saved_paths:
+                    print(f"   - {path}")
             
-            if success_count == 2:
+            if success_count == len(targets):
                 print()
                 print("🎉 Todas as telas foram enviadas com sucesso!")
             elif success_count == 0:
@@ -342,5 +314,99 @@ async def main():
         traceback.print_exc()
 
 
+async def main():
+    """Funcao principal (execucao unica)"""
+    profiler = profile_run("envio")
+    try:
+        await run_once()
+    finally:
+        if profiler is not None:
+            profiler.stop()
+
+
+def start_streamlit() -> subprocess.Popen:
+    """Sobe o Streamlit em background para o modo agendador"""
+    port = str(urlsplit(STREAMLIT_URL).port or 8501)
+    print(f"🚀 Iniciando Streamlit na porta {port}...")
+    return subprocess.Popen([
+        sys.executable, "-m", "streamlit", "run", DASHBOARD_FILE,
+        "--server.headless", "true", "--server.port", port
+    ])
+
+
+async def wait_for_streamlit(timeout: int = 60):
+    """Aguarda o Streamlit responder (sem sleep fixo)"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        try:
+            response = await asyncio.to_thread(_http.get, STREAMLIT_URL, timeout=2)
+            if response.status_code == 200:
+                print("✅ Streamlit rodando!")
+                return
+        except requests.exceptions.RequestException:
+            pass
+        await asyncio.sleep(0.5)
+    print("⚠️ Streamlit ainda nao respondeu, seguindo mesmo assim")
+
+
+async def run_scheduler():
+    """
+    Modo residente: navegador (e opcionalmente o Streamlit) ficam abertos e o
+    job roda nos horarios de SCHEDULE_CRON, pagando so pelo trabalho real
+    """
+    streamlit_proc = start_streamlit() if START_STREAMLIT else None
+    
+    try:
+        if streamlit_proc is not None:
+            await wait_for_streamlit()
+        
+        async with async_playwright() as p:
+            print("🌐 Iniciando navegador (fica aberto entre execucoes)...")
+            state = {'browser': await p.chromium.launch(headless=HEADLESS)}
+            
+            async def job():
+                # Reabre o navegador se ele caiu entre uma execucao e outra
+                if not state['browser'].is_connected():
+                    print("♻️ Navegador desconectado, reabrindo...")
+                    state['browser'] = await p.chromium.launch(headless=HEADLESS)
+                profiler = profile_run("envio")
+                try:
+                    await run_once(browser=state['browser'])
+                finally:
+                    if profiler is not None:
+                        profiler.stop()
+            
+            scheduler = Scheduler(
+                SCHEDULE_CRON,
+                job,
+                jitter=SCHEDULE_JITTER,
+                overlap=SCHEDULE_OVERLAP,
+                catchup_max=SCHEDULE_CATCHUP,
+                state_file=SCHEDULE_STATE_FILE,
+                name="dashboard"
+            )
+            
+            try:
+                await scheduler.run_forever()
+            finally:
+                await state['browser'].close()
+                print("🔒 Navegador fechado")
+    finally:
+        if streamlit_proc is not None:
+            streamlit_proc.terminate()
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Captura o dashboard e envia para o SeaTalk")
+    parser.add_argument(
+        "--agendar",
+        action="store_true",
+        help="Modo residente: executa nos horarios de SCHEDULE_CRON"
+    )
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(run_scheduler() if args.agendar else main())
+    except KeyboardInterrupt:
+        print("👋 Encerrado pelo usuario")
@@ -0,0 +1,95 @@
+"""
+Envio de imagem para o webhook do SeaTalk em streaming
+
+O corpo JSON ({"tag": "image", "image_base64": {"content": "..."}}) e gerado
+em pedacos: prefixo, base64 da imagem bloco a bloco e sufixo. A imagem pode
+vir de bytes/memoryview (sem copia) ou de um arquivo/caminho (lido em blocos),
+entao o pico de memoria fica em torno de um bloco, e nao em ~3x a imagem
+(bytes + string base64 + JSON serializado).
+"""
+
+import base64
+import io
+import os
+
+# Bloco lido/codificado por vez (multiplo de 3: o base64 dos blocos concatenados
+# e igual ao base64 da imagem inteira, sem padding no meio)
+CHUNK_SIZE = 3 * 64 * 1024
+
+IMAGE_PREFIX = b'{"tag": "image", "image_base64": {"content": "'
+IMAGE_SUFFIX = b'"}}'
+
+
+class ImageBody:
+    """
+    Corpo da requisicao gerado sob demanda, com tamanho conhecido
+
+    requests envia iteraveis com __len__ usando Content-Length (sem chunked),
+    bloco a bloco. Pode ser iterado de novo (ex: reenvio).
+
+    Args:
+        image: bytes, bytearray, memoryview, caminho do arquivo ou arquivo binario aberto
+        chunk_size: Bytes da imagem por bloco (arredondado para multiplo de 3)
+    """
+
+    def __init__(self, image, chunk_size: int = CHUNK_SIZE,
+                 prefix: bytes = IMAGE_PREFIX, suffix: bytes = IMAGE_SUFFIX):
+        self.prefix = prefix
+        self.suffix = suffix
+        self.chunk_size = max(3, chunk_size - chunk_size % 3)
+        self._view = None
+        self._path = None
+        self._file = None
+
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            self._view = memoryview(image).cast('B')
+            self.image_size = self._view.nbytes
+        elif isinstance(image, (str, os.PathLike)):
+            self._path = os.fspath(image)
+            self.image_size = os.path.getsize(self._path)
+        elif isinstance(image, io.IOBase) or hasattr(image, 'read'):
+            self._file = image
+            self._start = image.tell()
+            self.image_size = image.seek(0, io.SEEK_END) - self._start
+            image.seek(self._start)
+        else:
+            raise TypeError(f"Tipo de imagem nao suportado: {type(image).__name__}")
+
+    def __len__(self) -> int:
+        return len(self.prefix) + 4 * ((self.image_size + 2) // 3) + len(self.suffix)
+
+    def _chunks(self):
+        if self._view is not None:
+            for start in range(0, self.image_size, self.chunk_size):
+                yield self._view[start:start + self.chunk_size]
+        elif self._path is not None:
+            with open(self._path, 'rb') as f:
+                yield from iter(lambda: f.read(self.chunk_size), b'')
+        else:
+            self._file.seek(self._start)
+            yield from iter(lambda: self._file.read(self.chunk_size), b'')
+
+    def __iter__(self):
+        yield self.prefix
+        for chunk in self._chunks():
+            yield base64.b64encode(chunk)
+        yield self.suffix
+
+
+def post_image(session, webhook_url: str, image, timeout: int = 60):
+    """
+    Envia a imagem para o webhook em streaming
+
+    Args:
+        session: requests.Session (keep-alive entre envios)
+        image: ver ImageBody
+
+    Returns:
+        requests.Response
+    """
+    return session.post(
+        webhook_url,
+        data=ImageBody(image),
+        headers={'Content-Type': 'application/json'},
+        timeout=timeout
+    )
@@ -0,0 +1,137 @@
+"""
+Faixas de cor e formatos das colunas SOC/HUB
+
+Modulo neutro (sem Streamlit, sem rede) usado pelo dashboard, pelos alertas,
+pelo ranking e pelas tendencias: niveis de cada faixa, CSS das celulas,
+conversao de textos como '59,5%' para numero e formato de exibicao.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+# ============================================
+# FAIXAS
+# ============================================
+
+# Niveis: 0 = otimo, 1 = bom, 2 = atencao, 3 = alerta, 4 = critico
+LEVEL_CSS = {
+    0: 'background-color: #81c784; color: #1b5e20;',
+    1: 'background-color: #c8e6c9; color: #2e7d32;',
+    2: 'background-color: #fff9c4; color: #f57f17;',
+    3: 'background-color: #ffe0b2; color: #e65100;',
+    4: 'background-color: #ffcdd2; color: #c62828;',
+}
+
+LEVEL_ICON = {0: '🟢', 1: '🟢', 2: '🟡', 3: '🟠', 4: '🔴'}
+
+# Cada faixa e uma lista de regras (operador, limite, nivel) avaliadas em ordem,
+# igual a uma cadeia if/elif; 'default' vale quando nenhuma regra casa
+BANDS = {
+    'infrut': {'rules': [('>=', 1.0, 4), ('>=', 0.5, 3), ('>=', 0.25, 2)], 'default': 1},
+    'eta': {'rules': [('>=', 95, 0), ('>=', 85, 1), ('>=', 75, 2), ('>=', 60, 3)], 'default': 4},
+    'cancelado': {'rules': [('<=', 0.5, 0), ('<=', 1.0, 1), ('<=', 1.5, 2), ('<=', 2.0, 3)], 'default': 4},
+}
+
+# Coluna -> faixa avaliada nos alertas. %NS e %SPOT nao tem faixa padrao:
+# configure via ALERT_BANDS (ver load_column_bands)
+COLUMN_BANDS = {
+    '% INFRUT.': BANDS['infrut'],
+    '%ETA ORIGEM': BANDS['eta'],
+    '%CPT': BANDS['eta'],
+    '%ETA DESTINO': BANDS['eta'],
+    '%CANCELADO': BANDS['cancelado'],
+}
+
+_OPERATORS = {
+    '>=': np.greater_equal,
+    '>': np.greater,
+    '<=': np.less_equal,
+    '<': np.less,
+}
+
+
+def band_level(val, band: dict):
+    """Nivel de um valor isolado (None se nao for numerico)"""
+    try:
+        v = float(str(val).replace('%', '').replace(',', '.'))
+    except (TypeError, ValueError):
+        return None
+    if np.isnan(v):
+        return None
+    for op, limit, level in band['rules']:
+        if _OPERATORS[op](v, limit):
+            return level
+    return band['default']
+
+
+def band_css(val, band: dict) -> str:
+    """Estilo CSS da celula (mesmo contrato das funcoes color_* do dashboard)"""
+    level = band_level(val, band)
+    return '' if level is None else LEVEL_CSS[level]
+
+
+def to_numeric(series: pd.Series) -> pd.Series:
+    """Converte a coluna para float, aceitando textos como '-3.50%' ou '1,5'"""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    cleaned = series.astype(str).str.replace('%', '', regex=False).str.replace(',', '.', regex=False)
+    return pd.to_numeric(cleaned.str.strip(), errors='coerce')
+
+
+def band_levels(values: pd.Series, band: dict) -> np.ndarray:
+    """Nivel de cada linha da coluna de uma vez (-1 para valores nao numericos)"""
+    v = to_numeric(values).to_numpy()
+    conditions = [_OPERATORS[op](v, limit) for op, limit, _ in band['rules']]
+    choices = [level for _, _, level in band['rules']]
+    levels = np.select(conditions, choices, default=band['default'])
+    return np.where(np.isnan(v), -1, levels)
+
+
+def load_column_bands(config: str = "") -> dict:
+    """
+    Faixas por coluna: padrao do dashboard + overrides em JSON
+
+    Exemplo de ALERT_BANDS:
+        {"%CPT": {"rules": [[">=", 90, 0], [">=", 70, 2]], "default": 4},
+         "%SPOT": {"rules": [["<=", -10, 4]], "default": 0}}
+    """
+    bands = dict(COLUMN_BANDS)
+    if config:
+        for column, band in json.loads(config).items():
+            bands[column] = {
+                'rules': [tuple(rule) for rule in band['rules']],
+                'default': band.get('default', 0),
+            }
+    return bands
+
+
+# ============================================
+# FORMATOS
+# ============================================
+
+def _number_format(spec: str):
+    """Formatador que so aplica `spec` a numeros (textos passam como estao)"""
+    def format_value(value):
+        if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool):
+            return '' if np.isnan(value) else spec.format(value)
+        return '' if value is None else str(value)
+    return format_value
+
+
+# Coluna -> formatador (Styler.format das tabelas e texto dos alertas)
+COLUMN_FORMATS = {
+    '% INFRUT.': _number_format('{:.2f}%'),
+    'CANCELADO': _number_format('{:.0f}'),
+    '%CANCELADO': _number_format('{:.2f}%'),
+    '%ETA ORIGEM': _number_format('{:.2f}%'),
+    '%CPT': _number_format('{:.0f}%'),
+    '%ETA DESTINO': _number_format('{:.0f}%'),
+    '%SPOT': _number_format('{:.2f}%'),
+}
+
+
+def format_value(column: str, value) -> str:
+    """Valor como aparece no dashboard (ex: %CPT 59.0 -> '59%')"""
+    return COLUMN_FORMATS.get(column, _number_format('{:g}'))(value)
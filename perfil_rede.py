@@ -0,0 +1,211 @@
+"""
+Perfil de interceptacao de rede para a captura do dashboard (Playwright)
+
+Durante a captura o Chromium baixa tudo que o frontend do Streamlit pede:
+fontes web, favicon, pings de telemetria/health... Este modulo bloqueia ou
+responde localmente o que o screenshot nao precisa, serve os arquivos
+estaticos do frontend a partir de um cache em disco e mede o tempo de cada
+requisicao, para mostrar o que domina o tempo ate a pagina ficar pronta.
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import time
+from urllib.parse import urlsplit
+
+# ============================================
+# PERFIS
+# ============================================
+
+# Perfil padrao. Pode ser sobrescrito por um arquivo JSON com as mesmas chaves
+DEFAULT_PROFILE = {
+    # Tipos de recurso abortados (fontes: o texto cai na fonte do sistema)
+    'block_resource_types': ['font'],
+    # URLs abortadas (padroes fnmatch sobre a URL completa)
+    'block_urls': [
+        '*favicon*',
+        '*data.streamlit.io*',
+        '*webhooks.fivetran.com*',
+        '*segment.io*',
+        '*googletagmanager.com*',
+    ],
+    # URLs respondidas localmente: padrao -> [status, content-type, corpo]
+    'stub_urls': {
+        '*/_stcore/health': [200, 'text/plain', 'ok'],
+        '*/healthz': [200, 'text/plain', 'ok'],
+    },
+    # Caminhos servidos a partir do cache em disco (nomes com hash, imutaveis)
+    'cache_paths': ['/static/*'],
+    'cache_dir': '.cache_frontend',
+    # Quantas requisicoes mais lentas mostrar no relatorio
+    'report_top': 8,
+}
+
+PROFILES = {
+    'padrao': DEFAULT_PROFILE,
+    'desligado': None,
+}
+
+
+def load_profile(value: str):
+    """
+    Resolve CAPTURE_NETWORK_PROFILE: nome de perfil ('padrao', 'desligado')
+    ou caminho de um JSON com chaves do DEFAULT_PROFILE a sobrescrever
+
+    Returns:
+        dict com o perfil, ou None (sem interceptacao)
+    """
+    value = (value or 'padrao').strip()
+    if value in PROFILES:
+        return PROFILES[value]
+    with open(value, 'r', encoding='utf-8') as f:
+        return {**DEFAULT_PROFILE, **json.load(f)}
+
+
+# ============================================
+# INTERCEPTACAO
+# ============================================
+
+class NetworkRecorder:
+    """
+    Aplica o perfil em um contexto do Playwright e registra o tempo das requisicoes
+
+    Uso:
+        recorder = NetworkRecorder(profile)
+        await recorder.attach(context)
+        ... navegacao ...
+        recorder.print_report()
+    """
+
+    def __init__(self, profile: dict):
+        self.profile = profile
+        self.cache_dir = profile.get('cache_dir', DEFAULT_PROFILE['cache_dir'])
+        self.entries = []
+        self._pending = {}
+        self._started = time.perf_counter()
+
+    async def attach(self, context):
+        """Registra o handler de rotas e os eventos de requisicao no contexto"""
+        await context.route("**/*", self._handle_route)
+        context.on("request", self._on_request)
+        context.on("requestfinished", lambda request: self._on_done(request, failed=False))
+        context.on("requestfailed", lambda request: self._on_done(request, failed=True))
+
+    # ----- regras -----
+
+    def _matches(self, value: str, patterns) -> bool:
+        return any(fnmatch.fnmatch(value, pattern) for pattern in patterns)
+
+    def _stub_for(self, url: str):
+        for pattern, stub in self.profile.get('stub_urls', {}).items():
+            if fnmatch.fnmatch(url, pattern):
+                return stub
+        return None
+
+    def _cache_path(self, url: str) -> str:
+        path = urlsplit(url).path
+        return os.path.join(self.cache_dir, hashlib.sha1(path.encode('utf-8')).hexdigest())
+
+    async def _handle_route(self, route):
+        request = route.request
+        url = request.url
+
+        if request.resource_type in self.profile.get('block_resource_types', []) \
+                or self._matches(url, self.profile.get('block_urls', [])):
+            self._tag(request, 'bloqueado')
+            await route.abort()
+            return
+
+        stub = self._stub_for(url)
+        if stub is not None:
+            status, content_type, body = stub
+            self._tag(request, 'stub')
+            await route.fulfill(status=status, content_type=content_type, body=body)
+            return
+
+        if request.method == 'GET' and self._matches(urlsplit(url).path, self.profile.get('cache_paths', [])):
+            await self._serve_cached(route)
+            return
+
+        await route.continue_()
+
+    async def _serve_cached(self, route):
+        request = route.request
+        path = self._cache_path(request.url)
+        if os.path.exists(path):
+            with open(path + '.json', 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(path, 'rb') as f:
+                body = f.read()
+            self._tag(request, 'cache')
+            await route.fulfill(status=200, headers=meta['headers'], body=body)
+            return
+
+        response = await route.fetch()
+        body = await response.body()
+        if response.status == 200:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            headers = {
+                k: v for k, v in response.headers.items()
+                if k.lower() in ('content-type', 'cache-control', 'etag', 'last-modified')
+            }
+            with open(path + '.json', 'w', encoding='utf-8') as f:
+                json.dump({'url': request.url, 'headers': headers}, f)
+            with open(path, 'wb') as f:
+                f.write(body)
+        self._tag(request, 'rede (cache novo)')
+        await route.fulfill(response=response, body=body)
+
+    # ----- medicao -----
+
+    def _tag(self, request, origin: str):
+        entry = self._pending.get(request)
+        if entry is not None:
+            entry['origem'] = origin
+
+    def _on_request(self, request):
+        self._pending[request] = {
+            'url': request.url,
+            'tipo': request.resource_type,
+            'origem': 'rede',
+            'inicio_ms': (time.perf_counter() - self._started) * 1000,
+            '_t0': time.perf_counter(),
+        }
+
+    def _on_done(self, request, failed: bool):
+        entry = self._pending.pop(request, None)
+        if entry is None:
+            return
+        entry['duracao_ms'] = (time.perf_counter() - entry.pop('_t0')) * 1000
+        entry['falhou'] = failed and entry['origem'] != 'bloqueado'
+        self.entries.append(entry)
+
+    def summary(self) -> dict:
+        """Totais por origem (rede, cache, stub, bloqueado)"""
+        totals = {}
+        for entry in self.entries:
+            item = totals.setdefault(entry['origem'], {'requisicoes': 0, 'ms': 0.0})
+            item['requisicoes'] += 1
+            item['ms'] += entry['duracao_ms']
+        return totals
+
+    def print_report(self):
+        """Mostra as requisicoes mais lentas e os totais por origem"""
+        top = self.profile.get('report_top', DEFAULT_PROFILE['report_top'])
+        slowest = sorted(self.entries, key=lambda e: e['duracao_ms'], reverse=True)[:top]
+        print()
+        print(f"🌐 Rede: {len(self.entries)} requisicoes")
+        for origin, item in self.summary().items():
+            print(f"   - {origin}: {item['requisicoes']} req, {item['ms']:.0f} ms somados")
+        if slowest:
+            print("   Mais lentas:")
+            for entry in slowest:
+                url = entry['url'] if len(entry['url']) <= 80 else entry['url'][:77] + '...'
+                print(f"   {entry['duracao_ms']:7.0f} ms | {entry['tipo']:<10} | {entry['origem']:<8} | {url}")
+
+    def save(self, path: str):
+        """Grava todas as medicoes em JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'summary': self.summary(), 'requests': self.entries}, f, indent=2)
@@ -0,0 +1,199 @@
+"""
+Perfilamento opcional do dashboard e do envio para o SeaTalk
+
+Ativado por variavel de ambiente (PROFILE=1) ou, no dashboard, pelo
+parametro de URL ?profile=1 (se PROFILE_ALLOW_QUERY=true). Cada execucao gera em PROFILE_DIR:
+    - <nome>_<horario>.folded  (pilhas amostradas, formato do flamegraph.pl/speedscope)
+    - <nome>_<horario>.pstats  (cProfile, so com PROFILE_MODE=deterministico/ambos;
+                                abrir com pstats/snakeviz)
+Os arquivos mais antigos sao apagados (PROFILE_KEEP execucoes por nome).
+"""
+
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+# ============================================
+# CONFIGURACOES
+# ============================================
+
+# Liga o perfilamento de todas as execucoes
+PROFILE_ENABLED = os.getenv("PROFILE", "0") == "1"
+
+# Pasta dos perfis gerados
+PROFILE_DIR = os.getenv("PROFILE_DIR", "perfis")
+
+# 'amostragem' (so pilhas, overhead pequeno), 'deterministico' (so pstats) ou
+# 'ambos'. O cProfile pesa em toda chamada de funcao: ligue so para diagnostico
+PROFILE_MODE = os.getenv("PROFILE_MODE", "amostragem")
+
+# Intervalo entre amostras de pilha (segundos)
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+
+# Execucoes mantidas por nome (rotacao)
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "30"))
+
+# Permite ativar no dashboard com ?profile=1 (desligado: qualquer visitante gravaria em disco)
+PROFILE_ALLOW_QUERY = os.getenv("PROFILE_ALLOW_QUERY", "false").lower() == "true"
+
+# Tempo maximo de amostragem (s): execucao que nunca chama stop() nao amostra para sempre
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "600"))
+
+# Perfis ainda abertos por thread (reruns do Streamlit podem interromper o script)
+_active = {}
+_active_lock = threading.Lock()
+
+
+# ============================================
+# AMOSTRAGEM DE PILHAS
+# ============================================
+
+class StackSampler(threading.Thread):
+    """
+    Amostra periodicamente a pilha de uma thread e conta as pilhas (formato folded)
+
+    Para sozinho quando a thread amostrada termina (ex: sessao do Streamlit
+    fechada) ou depois de max_seconds.
+    """
+
+    def __init__(self, thread_id: int, interval: float, max_seconds: float = None):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_seconds = max_seconds or PROFILE_MAX_SECONDS
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None or time.monotonic() > deadline:
+                return
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+# ============================================
+# PERFIL DE UMA EXECUCAO
+# ============================================
+
+class RunProfiler:
+    """
+    Perfila uma execucao (script do Streamlit ou main() do envio)
+
+    Uso:
+        with RunProfiler("envio"):
+            ...
+    ou start()/stop() quando o trecho nao cabe em um bloco with.
+    """
+
+    def __init__(self, name: str, directory: str = None, mode: str = None, interval: float = None):
+        self.name = name
+        self.directory = directory or PROFILE_DIR
+        self.mode = mode or PROFILE_MODE
+        self.interval = interval or PROFILE_INTERVAL
+        self._profile = None
+        self._sampler = None
+        self._started = None
+        self._thread_id = None
+
+    def start(self):
+        self._thread_id = threading.get_ident()
+        with _active_lock:
+            previous = _active.pop(self._thread_id, None)
+        if previous is not None:
+            # Execucao anterior interrompida (ex: rerun do Streamlit) sem chamar stop()
+            previous.stop()
+
+        if self.mode in ("ambos", "deterministico"):
+            self._profile = cProfile.Profile()
+            try:
+                self._profile.enable()
+            except ValueError:
+                # Outro profiler ja ativo (Python 3.12+ permite um por vez): so amostragem
+                self._profile = None
+        if self.mode in ("ambos", "amostragem") or self._profile is None:
+            self._sampler = StackSampler(self._thread_id, self.interval)
+            self._sampler.start()
+
+        self._started = time.perf_counter()
+        with _active_lock:
+            _active[self._thread_id] = self
+        return self
+
+    def stop(self):
+        """Finaliza e grava os arquivos; retorna o prefixo dos arquivos gerados"""
+        if self._started is None:
+            return None
+        elapsed = time.perf_counter() - self._started
+        self._started = None
+        with _active_lock:
+            if _active.get(self._thread_id) is self:
+                del _active[self._thread_id]
+
+        if self._profile is not None:
+            self._profile.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        prefix = os.path.join(self.directory, f"{self.name}_{stamp}")
+        if self._profile is not None:
+            self._profile.dump_stats(prefix + ".pstats")
+        if self._sampler is not None:
+            with open(prefix + ".folded", 'w', encoding='utf-8') as f:
+                for stack, count in self._sampler.stacks.items():
+                    f.write(f"{stack} {count}\n")
+
+        rotate(self.directory, self.name, PROFILE_KEEP)
+        print(f"🔬 Perfil '{self.name}' gravado em {prefix}.* ({elapsed:.2f}s)")
+        return prefix
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def rotate(directory: str, name: str, keep: int):
+    """Mantem apenas as `keep` execucoes mais recentes de um nome"""
+    runs = {}
+    for filename in os.listdir(directory):
+        if filename.startswith(name + "_") and filename.endswith((".pstats", ".folded")):
+            runs.setdefault(filename.rsplit(".", 1)[0], []).append(filename)
+    for run in sorted(runs)[:-keep or None]:
+        for filename in runs[run]:
+            try:
+                os.remove(os.path.join(directory, filename))
+            except OSError:
+                pass
+
+
+def profile_run(name: str, enabled: bool = None):
+    """
+    Retorna um RunProfiler ja iniciado se o perfilamento estiver ligado, senao None
+
+    Args:
+        enabled: Forca ligar/desligar; None usa a variavel PROFILE
+    """
+    if enabled is None:
+        enabled = PROFILE_ENABLED
+    if not enabled:
+        return None
+    return RunProfiler(name).start()
@@ -0,0 +1,101 @@
+"""
+Ranking das piores operacoes (SOC/HUB) por score ponderado
+
+O score soma, para cada indicador, peso x "quanto falta para o ideal":
+100 - valor nos indicadores em que maior e melhor (%CPT, %ETA ORIGEM) e o
+proprio valor nos que menor e melhor (%CANCELADO, % INFRUT.). As N piores
+saem por selecao parcial (np.argpartition), sem ordenar a tabela inteira.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from faixas import to_numeric
+
+# ============================================
+# PESOS
+# ============================================
+
+# Indicador -> (peso, direcao). Cancelado/infrutifera sao percentuais pequenos,
+# por isso pesam mais para ficar na mesma escala de CPT/ETA
+DEFAULT_WEIGHTS = {
+    '%CPT': (1.0, 'maior'),
+    '%ETA ORIGEM': (1.0, 'maior'),
+    '%CANCELADO': (10.0, 'menor'),
+    '% INFRUT.': (10.0, 'menor'),
+}
+
+
+def load_weights(config: str = "") -> dict:
+    """
+    Pesos do score: padrao + overrides em JSON
+
+    Exemplo de WORST_WEIGHTS:
+        {"%CPT": 2, "%ETA DESTINO": [1, "maior"], "% INFRUT.": 0}
+    Peso 0 remove o indicador; direcao 'maior' = maior e melhor.
+    """
+    weights = dict(DEFAULT_WEIGHTS)
+    if config:
+        for column, value in json.loads(config).items():
+            if isinstance(value, list):
+                weights[column] = (float(value[0]), value[1])
+            else:
+                direction = weights.get(column, (0, 'maior'))[1]
+                weights[column] = (float(value), direction)
+    return {column: w for column, w in weights.items() if w[0] != 0}
+
+
+def compute_scores(values: np.ndarray, weights: dict) -> np.ndarray:
+    """
+    Score de cada linha (maior = pior)
+
+    Args:
+        values: Matriz (linhas x indicadores) na ordem de weights; NaN nao pontua
+    """
+    score = np.zeros(values.shape[0])
+    for j, (weight, direction) in enumerate(weights.values()):
+        column = values[:, j]
+        badness = 100.0 - column if direction == 'maior' else column
+        score += weight * np.nan_to_num(badness, nan=0.0)
+    return score
+
+
+def worst_indices(scores: np.ndarray, n: int) -> np.ndarray:
+    """Indices das n maiores notas, ordenados do pior para o melhor (O(N + n log n))"""
+    n = min(n, len(scores))
+    if n <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, n - 1)[:n]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+# ============================================
+# RANKING
+# ============================================
+
+def metric_matrix(df: pd.DataFrame, metrics: list) -> np.ndarray:
+    """Matriz (linhas x indicadores) numerica; indicador ausente vira NaN"""
+    if not metrics:
+        return np.empty((len(df), 0))
+    return np.column_stack([
+        to_numeric(df[m]).to_numpy(dtype='float64') if m in df.columns else np.full(len(df), np.nan)
+        for m in metrics
+    ])
+
+
+def worst_operations(df: pd.DataFrame, weights: dict, n: int) -> pd.DataFrame:
+    """
+    As n piores linhas da tabela com POS e SCORE na frente
+
+    Todas as linhas entram, inclusive a mesma operacao em mais de uma
+    planilha (FONTE) ou repetida na mesma aba.
+    """
+    values = metric_matrix(df, list(weights))
+    scores = compute_scores(values, weights)
+    idx = worst_indices(scores, n)
+    rows = df.iloc[idx].reset_index(drop=True)
+    rows.insert(0, 'SCORE', np.round(scores[idx], 1))
+    rows.insert(0, 'POS', np.arange(1, len(rows) + 1))
+    return rows
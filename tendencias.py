@@ -0,0 +1,214 @@
+"""
+Historico horario de indicadores SOC/HUB e downsampling para os graficos
+
+O dashboard grava um ponto por operacao a cada intervalo (padrao: 1 hora) em
+HISTORY_DIR. A aba de tendencias le esse historico e reduz cada serie com
+LTTB (Largest-Triangle-Three-Buckets) para um numero fixo de pontos antes
+de mandar para o navegador.
+"""
+
+import hashlib
+import os
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from carregar_planilhas import SOURCE_COLUMN
+from faixas import to_numeric
+
+# ============================================
+# CONFIGURACOES
+# ============================================
+
+# Indicadores guardados no historico
+TREND_METRICS = ['%ETA ORIGEM', '%CPT', '%ETA DESTINO', '%CANCELADO', 'NO SHOW']
+
+
+# ============================================
+# DOWNSAMPLING (LTTB)
+# ============================================
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int):
+    """
+    Reduz a serie (x, y) para n_out pontos preservando a forma visual
+
+    x deve estar em ordem crescente; valores NaN em y devem ser removidos antes.
+
+    Returns:
+        tuple: (x_reduzido, y_reduzido)
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    xf = x.astype('float64')
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    # Buckets internos (o primeiro e o ultimo ponto ficam fixos)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Media do proximo bucket (ou o ultimo ponto, no ultimo bucket)
+        if i + 2 < n_out - 1:
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x = xf[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = xf[-1], y[-1]
+
+        ax, ay = xf[previous], y[previous]
+        area = np.abs(
+            (ax - avg_x) * (y[start:end] - ay) - (ax - xf[start:end]) * (avg_y - ay)
+        )
+        previous = start + int(area.argmax())
+        selected[i + 1] = previous
+
+    return x[selected], y[selected]
+
+
+def downsample_series(df: pd.DataFrame, x_col: str, y_col: str, n_out: int) -> pd.DataFrame:
+    """Aplica LTTB em uma serie de um DataFrame (ordenada por x_col, sem NaN)"""
+    df = df.dropna(subset=[y_col]).sort_values(x_col)
+    if len(df) <= n_out:
+        return df[[x_col, y_col]]
+    x, y = lttb(df[x_col].to_numpy(), df[y_col].to_numpy(dtype='float64'), n_out)
+    return pd.DataFrame({x_col: x, y_col: y})
+
+
+# ============================================
+# HISTORICO
+# ============================================
+
+class HistoryStore:
+    """
+    Guarda um snapshot dos indicadores por intervalo de tempo
+
+    Arquivos: <directory>/<tipo>/<AAAAMMDDHHMM>.pkl com as colunas
+    TS, OPERACAO, REGIONAL, FONTE (vazia com uma so planilha) e TREND_METRICS (numericas). Dentro do mesmo
+    intervalo o arquivo e sobrescrito com o dado mais recente.
+
+    Args:
+        directory: Pasta do historico
+        bucket_minutes: Tamanho do intervalo (60 = um ponto por hora)
+        retention_days: Arquivos mais antigos que isso sao apagados
+    """
+
+    def __init__(self, directory: str = "historico", bucket_minutes: int = 60, retention_days: int = 35):
+        self.directory = directory
+        self.bucket_minutes = max(1, bucket_minutes)
+        self.retention_days = retention_days
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, when: datetime) -> datetime:
+        minutes = (when.hour * 60 + when.minute) // self.bucket_minutes * self.bucket_minutes
+        return when.replace(hour=minutes // 60, minute=minutes % 60, second=0, microsecond=0)
+
+    def record(self, kind: str, df: pd.DataFrame, when: datetime = None):
+        """Grava os indicadores de df (tabela SOC ou HUB) no intervalo atual"""
+        if df.empty or kind not in df.columns:
+            return
+        bucket = self._bucket(when or datetime.now())
+        points = pd.DataFrame({
+            'TS': bucket,
+            'OPERACAO': df[kind].astype(str).to_numpy(),
+            'REGIONAL': df['REGIONAL'].astype(str).to_numpy() if 'REGIONAL' in df.columns else '',
+            SOURCE_COLUMN: df[SOURCE_COLUMN].astype(str).to_numpy() if SOURCE_COLUMN in df.columns else '',
+        })
+        for metric in TREND_METRICS:
+            points[metric] = to_numeric(df[metric]).to_numpy() if metric in df.columns else np.nan
+
+        digest = hashlib.sha1(pd.util.hash_pandas_object(points, index=False).to_numpy().tobytes()).hexdigest()
+        key = (kind, bucket)
+        with self._lock:
+            if self._hashes.get(key) == digest:
+                return
+            folder = os.path.join(self.directory, kind)
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, f"{bucket:%Y%m%d%H%M}.pkl")
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            points.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+            self._hashes = {k: v for k, v in self._hashes.items() if k[1] == bucket}
+            self._hashes[key] = digest
+        self._purge(kind)
+
+    def _purge(self, kind: str):
+        limit = f"{datetime.now() - timedelta(days=self.retention_days):%Y%m%d%H%M}"
+        for filename in self.files(kind):
+            if filename[:12] < limit:
+                try:
+                    os.remove(os.path.join(self.directory, kind, filename))
+                except OSError:
+                    pass
+
+    def files(self, kind: str) -> list:
+        folder = os.path.join(self.directory, kind)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(f for f in os.listdir(folder) if f.endswith('.pkl'))
+
+    def load(self, kind: str, since: datetime) -> pd.DataFrame:
+        """Le o historico a partir de `since` (formato longo: uma linha por operacao e horario)"""
+        start = f"{since:%Y%m%d%H%M}"
+        frames = [
+            pd.read_pickle(os.path.join(self.directory, kind, filename))
+            for filename in self.files(kind)
+            if filename[:12] >= start
+        ]
+        if not frames:
+            return pd.DataFrame(columns=['TS', 'OPERACAO', 'REGIONAL', SOURCE_COLUMN] + TREND_METRICS)
+        history = pd.concat(frames, ignore_index=True)
+        # Arquivos gravados antes da coluna FONTE existir
+        if SOURCE_COLUMN not in history.columns:
+            history[SOURCE_COLUMN] = ''
+        history[SOURCE_COLUMN] = history[SOURCE_COLUMN].fillna('')
+        return history
+
+
+# ============================================
+# GRAFICO
+# ============================================
+
+def trend_figure(history: pd.DataFrame, metric: str, operations: list, point_budget: int = 2000):
+    """
+    Grafico de linhas (plotly) do indicador ao longo do tempo
+
+    Args:
+        history: Saida de HistoryStore.load
+        metric: Coluna de TREND_METRICS
+        operations: Operacoes a mostrar; vazio = media geral de todas
+        point_budget: Total de pontos enviados ao navegador (dividido entre as series)
+    """
+    import plotly.graph_objects as go
+
+    if operations:
+        # Uma serie por (FONTE, OPERACAO); nomes repetidos na mesma fonte viram a media por horario
+        subset = history[history['OPERACAO'].isin(operations)]
+        series = [
+            (f"{source} / {operation}" if source else operation,
+             data.groupby('TS', as_index=False)[metric].mean())
+            for (source, operation), data in subset.groupby([SOURCE_COLUMN, 'OPERACAO'], sort=True)
+        ]
+    else:
+        series = [('MEDIA GERAL', history.groupby('TS', as_index=False)[metric].mean())]
+
+    per_series = max(50, point_budget // max(1, len(series)))
+    fig = go.Figure()
+    for name, data in series:
+        points = downsample_series(data, 'TS', metric, per_series)
+        fig.add_trace(go.Scattergl(x=points['TS'], y=points[metric], mode='lines', name=str(name)))
+
+    fig.update_layout(
+        height=520,
+        margin=dict(l=10, r=10, t=30, b=10),
+        legend=dict(orientation='h', y=-0.15),
+        yaxis_title=metric,
+        hovermode='x unified',
+    )
+    return fig
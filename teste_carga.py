@@ -0,0 +1,458 @@
+"""
+Teste de carga do dashboard: N sessoes Streamlit simultaneas
+
+Sobe o dashboard_performance.py apontando para um servidor CSV local (no lugar
+do Google Sheets), abre N paginas headless (cada uma e uma sessao Streamlit,
+como uma TV de SOC) e mede:
+    - tempo da primeira carga de cada sessao
+    - latencia de cada rerun (tecla "r" ate o script terminar), p50/p90/p95/p99
+    - CPU e memoria do processo do Streamlit durante cada nivel de carga
+
+Execute:
+    python teste_carga.py                          # 1, 5, 10 e 20 sessoes
+    python teste_carga.py --sessoes 30 --reruns 20 --saida carga.json
+    python teste_carga.py --url http://servidor:8501 --sessoes 10   # dashboard ja rodando
+
+Requer playwright (python -m playwright install chromium); psutil e opcional
+(sem ele CPU/memoria sao lidos de /proc, so no Linux).
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import requests
+
+try:
+    import psutil
+except ImportError:  # psutil e opcional: sem ele le /proc
+    psutil = None
+
+# ============================================
+# CONFIGURACOES
+# ============================================
+
+DASHBOARD_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dashboard_performance.py")
+
+# Porta do Streamlit iniciado pelo teste (separada da 8501 do dia a dia)
+DASHBOARD_PORT = 8599
+
+# ID de planilha usado contra o servidor local
+LOAD_SHEET_ID = "teste-carga"
+
+# Estado do script no elemento raiz do Streamlit
+APP_IDLE_SELECTOR = '[data-testid="stApp"][data-test-script-state="notRunning"]'
+
+# Excecao do script renderizada na pagina (sessao conta como falha)
+APP_EXCEPTION_SELECTOR = '[data-testid="stException"]'
+
+# Registra o fim do proximo rerun: o relogio comeca no keydown e para quando o
+# estado passa por "running" e volta para "notRunning"
+INSTALL_RERUN_PROBE = """
+() => {
+    const app = document.querySelector('[data-testid="stApp"]');
+    let t0 = performance.now();
+    document.addEventListener('keydown', () => { t0 = performance.now(); }, {once: true, capture: true});
+    window.__rerunProbe = new Promise((resolve) => {
+        let started = false;
+        const observer = new MutationObserver(() => {
+            const state = app.getAttribute('data-test-script-state');
+            if (state === 'running') {
+                started = true;
+            } else if (started && state === 'notRunning') {
+                observer.disconnect();
+                resolve(performance.now() - t0);
+            }
+        });
+        observer.observe(app, {attributes: true, attributeFilter: ['data-test-script-state']});
+    });
+}
+"""
+
+METRIC_COLUMNS = [
+    'EM ATRIBUICAO', 'AG. CHEGADA', 'AG. CARREG.', 'CARREGANDO', 'CARREGADOS', 'AG. DESCARGA',
+    'NO SHOW', '%NS', 'INFRUT.', '% INFRUT.', 'CANCELADO', '%CANCELADO', 'FECHADAS',
+    '%ETA ORIGEM', '%CPT', '%ETA DESTINO', '%SPOT', 'SPOT PEND.',
+]
+
+
+# ============================================
+# FONTE DE DADOS LOCAL (no lugar do Google Sheets)
+# ============================================
+
+def build_sheet(kind: str, rows: int, seed: int = 0) -> bytes:
+    """
+    CSV sintetico com as mesmas colunas e tipos das abas SOC/HUB
+
+    Como em get_sample_data_*, os percentuais sao numeros (o dashboard formata
+    com '{:.2f}%'); so %NS vem como texto ('-3.50%').
+    """
+    rng = np.random.default_rng(seed)
+    regionals = np.array(['SPC/SUL', 'SPI/SUD'])
+    data = {
+        'REGIONAL': [f'"{r}"' for r in regionals[rng.integers(0, 2, rows)]],
+        kind: [f'"{kind}-L{i:03d}"' for i in range(rows)],
+    }
+    for column in METRIC_COLUMNS:
+        if column == '%NS':
+            data[column] = [f'"{v:.2f}%"' for v in rng.uniform(-5, 1, rows)]
+        elif column == '%SPOT':
+            data[column] = [f"{v:.2f}" for v in rng.uniform(-10, 0, rows)]
+        elif 'ETA' in column or 'CPT' in column:
+            data[column] = [f"{v:.2f}" for v in rng.uniform(60, 100, rows)]
+        elif column.startswith('%'):
+            data[column] = [f"{v:.2f}" for v in rng.uniform(0, 3, rows)]
+        else:
+            data[column] = [str(v) for v in rng.integers(0, 500, rows)]
+
+    lines = [",".join(f'"{c}"' for c in data)]
+    for i in range(rows):
+        lines.append(",".join(data[c][i] for c in data))
+    return ("\n".join(lines) + "\n").encode('utf-8')
+
+
+def start_data_server(rows_soc: int, rows_hub: int, delay: float) -> ThreadingHTTPServer:
+    """Servidor gviz falso: /d/<id>/gviz/tq?tqx=out:csv&sheet=<aba>, com ETag e gzip"""
+    sheets = {'SOC': build_sheet('SOC', rows_soc, 1), 'HUB': build_sheet('HUB', rows_hub, 2)}
+    etags = {name: '"' + hashlib.sha1(body).hexdigest()[:16] + '"' for name, body in sheets.items()}
+
+    class DataHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            sheet = parse_qs(urlsplit(self.path).query).get('sheet', [''])[0]
+            if sheet not in sheets:
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if delay:
+                time.sleep(delay)  # Latencia simulada do Google
+            if self.headers.get('If-None-Match') == etags[sheet]:
+                self.send_response(304)
+                self.send_header('ETag', etags[sheet])
+                self.end_headers()
+                return
+            body = sheets[sheet]
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/csv; charset=utf-8')
+            self.send_header('ETag', etags[sheet])
+            if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                body = gzip.compress(body)
+                self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), DataHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="dados-carga", daemon=True).start()
+    return server
+
+
+# ============================================
+# DASHBOARD
+# ============================================
+
+def start_dashboard(port: int, data_url: str, workdir: str) -> subprocess.Popen:
+    """Sobe o Streamlit lendo do servidor local; snapshots/historico vao para workdir"""
+    env = {
+        **os.environ,
+        'GOOGLE_SHEET_ID': LOAD_SHEET_ID,
+        'GOOGLE_SHEET_SOURCES': '',
+        'GOOGLE_CREDENTIALS': '',
+        'SHEETS_BASE_URL': data_url,
+        'SNAPSHOT_DIR': os.path.join(workdir, 'snapshots'),
+        'HISTORY_DIR': os.path.join(workdir, 'historico'),
+        'SNAPSHOT_API': 'false',
+        'PROFILE': '0',
+    }
+    cmd = [
+        sys.executable, '-m', 'streamlit', 'run', DASHBOARD_FILE,
+        '--server.port', str(port),
+        '--server.headless', 'true',
+        '--browser.gatherUsageStats', 'false',
+    ]
+    return subprocess.Popen(cmd, env=env, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_for_dashboard(url: str, timeout: int = 60) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{url}/_stcore/health", timeout=2).status_code == 200:
+                return True
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+# ============================================
+# CPU / MEMORIA DO SERVIDOR
+# ============================================
+
+class ProcessSampler(threading.Thread):
+    """Amostra CPU (%) e RSS (MB) de um processo ate stop()"""
+
+    def __init__(self, pid: int, interval: float = 0.5):
+        super().__init__(name="amostra-processo", daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.cpu = []
+        self.rss = []
+        self._stop_event = threading.Event()
+
+    def _read_proc(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        ticks = int(fields[11]) + int(fields[12])  # utime + stime
+        with open(f"/proc/{self.pid}/status") as f:
+            rss_kb = next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+        return ticks / os.sysconf('SC_CLK_TCK'), rss_kb * 1024
+
+    def run(self):
+        try:
+            if psutil is not None:
+                process = psutil.Process(self.pid)
+                process.cpu_percent(None)
+                while not self._stop_event.wait(self.interval):
+                    self.cpu.append(process.cpu_percent(None))
+                    self.rss.append(process.memory_info().rss / 1e6)
+            else:
+                last_cpu, _ = self._read_proc()
+                last_time = time.perf_counter()
+                while not self._stop_event.wait(self.interval):
+                    cpu_seconds, rss = self._read_proc()
+                    now = time.perf_counter()
+                    self.cpu.append(100 * (cpu_seconds - last_cpu) / (now - last_time))
+                    self.rss.append(rss / 1e6)
+                    last_cpu, last_time = cpu_seconds, now
+        except Exception as e:  # Processo encerrado (OSError, psutil.NoSuchProcess...)
+            print(f"⚠️ Amostragem do processo {self.pid} interrompida: {e}")
+
+    def stop(self) -> dict:
+        self._stop_event.set()
+        self.join()
+        return {
+            'cpu_mean': float(np.mean(self.cpu)) if self.cpu else None,
+            'cpu_max': float(np.max(self.cpu)) if self.cpu else None,
+            'rss_max_mb': float(np.max(self.rss)) if self.rss else None,
+            'rss_end_mb': self.rss[-1] if self.rss else None,
+        }
+
+
+# ============================================
+# SESSOES
+# ============================================
+
+async def _exception_text(page) -> str:
+    element = await page.query_selector(APP_EXCEPTION_SELECTOR)
+    text = (await element.inner_text()) if element else ""
+    return " ".join(text.split())[:200]
+
+
+async def run_session(browser, url: str, start_delay: float, reruns: int, think: float, timeout: float) -> dict:
+    """Uma sessao: abre o dashboard e dispara `reruns` reruns, medindo cada um"""
+    await asyncio.sleep(start_delay)
+    context = await browser.new_context(viewport={'width': 1920, 'height': 1080})
+    page = await context.new_page()
+    result = {'first_load': None, 'reruns': [], 'errors': 0, 'failed': False}
+    try:
+        started = time.perf_counter()
+        await page.goto(url, wait_until='domcontentloaded', timeout=timeout * 1000)
+        await page.wait_for_selector(APP_IDLE_SELECTOR, timeout=timeout * 1000)
+        if await page.query_selector(APP_EXCEPTION_SELECTOR):
+            # Script quebrou no meio: tempo medido nao e de uma execucao completa
+            print(f"❌ Sessao falhou: excecao no dashboard ({await _exception_text(page)})")
+            result['errors'] += 1
+            result['failed'] = True
+            return result
+        result['first_load'] = (time.perf_counter() - started) * 1000
+
+        for _ in range(reruns):
+            await asyncio.sleep(think * random.uniform(0.5, 1.5))
+            try:
+                await page.evaluate(INSTALL_RERUN_PROBE)
+                await page.keyboard.press('r')
+                elapsed = await asyncio.wait_for(page.evaluate("window.__rerunProbe"), timeout)
+            except Exception:
+                result['errors'] += 1
+                continue
+            if await page.query_selector(APP_EXCEPTION_SELECTOR):
+                print(f"❌ Sessao falhou no rerun: {await _exception_text(page)}")
+                result['errors'] += 1
+                result['failed'] = True
+                break
+            result['reruns'].append(elapsed)
+    except Exception as e:
+        print(f"❌ Sessao falhou: {e}")
+        result['errors'] += 1
+        result['failed'] = True
+    finally:
+        await context.close()
+    return result
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {}
+    arr = np.asarray(values)
+    return {
+        'p50': float(np.percentile(arr, 50)),
+        'p90': float(np.percentile(arr, 90)),
+        'p95': float(np.percentile(arr, 95)),
+        'p99': float(np.percentile(arr, 99)),
+        'max': float(arr.max()),
+    }
+
+
+async def run_level(browser, url: str, sessions: int, args, pid: int = None) -> dict:
+    """Roda `sessions` sessoes simultaneas e agrega as medidas"""
+    sampler = ProcessSampler(pid) if pid else None
+    if sampler is not None:
+        sampler.start()
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        run_session(browser, url, i * args.rampa / sessions, args.reruns, args.intervalo, args.timeout)
+        for i in range(sessions)
+    ))
+    elapsed = time.perf_counter() - started
+    server = sampler.stop() if sampler is not None else {}
+
+    reruns = [ms for r in results for ms in r['reruns']]
+    session_p95 = [float(np.percentile(r['reruns'], 95)) for r in results if r['reruns']]
+    return {
+        'sessions': sessions,
+        'seconds': elapsed,
+        'first_load': percentiles([r['first_load'] for r in results if r['first_load'] is not None]),
+        'rerun': percentiles(reruns),
+        'rerun_count': len(reruns),
+        'worst_session_p95': max(session_p95) if session_p95 else None,
+        'errors': sum(r['errors'] for r in results),
+        'failed_sessions': sum(r['failed'] for r in results),
+        'server': server,
+    }
+
+
+def print_report(levels: list):
+    def fmt(value, suffix=""):
+        return f"{value:.0f}{suffix}" if value is not None else "-"
+
+    print()
+    print("=" * 110)
+    print("📊 RESULTADO (latencias em ms)")
+    print("=" * 110)
+    print(f"{'sessoes':>7} {'1a carga p50':>12} {'p95':>7} | {'rerun p50':>9} {'p90':>7} {'p95':>7} {'p99':>7} "
+          f"{'max':>7} {'pior sessao p95':>15} | {'erros':>5} {'falhas':>6} {'CPU med':>8} {'CPU max':>8} {'RSS max':>8}")
+    for level in levels:
+        first, rerun, server = level['first_load'], level['rerun'], level['server']
+        print(f"{level['sessions']:>7} {fmt(first.get('p50')):>12} {fmt(first.get('p95')):>7} | "
+              f"{fmt(rerun.get('p50')):>9} {fmt(rerun.get('p90')):>7} {fmt(rerun.get('p95')):>7} "
+              f"{fmt(rerun.get('p99')):>7} {fmt(rerun.get('max')):>7} {fmt(level['worst_session_p95']):>15} | "
+              f"{level['errors']:>5} {level['failed_sessions']:>6} {fmt(server.get('cpu_mean'), '%'):>8} {fmt(server.get('cpu_max'), '%'):>8} "
+              f"{fmt(server.get('rss_max_mb'), 'MB'):>8}")
+    print("=" * 110)
+    print("CPU em % de um nucleo (pode passar de 100%). Pior sessao p95 = maior p95 individual entre as sessoes.")
+    print("Falhas = sessoes com excecao no dashboard ou que nao carregaram (reruns delas nao entram nas latencias).")
+
+
+async def run(args):
+    from playwright.async_api import async_playwright
+
+    data_server = None
+    dashboard = None
+    pid = args.pid
+    url = args.url
+    workdir = tempfile.mkdtemp(prefix="teste_carga_")
+
+    try:
+        if not url:
+            data_server = start_data_server(args.linhas_soc, args.linhas_hub, args.atraso_dados)
+            data_url = f"http://127.0.0.1:{data_server.server_address[1]}"
+            print(f"🗄️ Fonte de dados local: {data_url} ({args.linhas_soc} SOCs, {args.linhas_hub} HUBs)")
+
+            dashboard = start_dashboard(args.porta, data_url, workdir)
+            pid = dashboard.pid
+            url = f"http://localhost:{args.porta}"
+            print(f"🚀 Iniciando dashboard em {url}...")
+            if not wait_for_dashboard(url):
+                print("❌ Dashboard nao respondeu a tempo")
+                return None
+
+        levels = []
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            try:
+                # Aquecimento: primeira execucao preenche caches (dados, estilos)
+                warmup = await run_session(browser, url, 0, 1, 0, args.timeout)
+                if warmup['failed']:
+                    print("❌ O dashboard falhou ja no aquecimento; teste cancelado")
+                    return None
+
+                for sessions in args.sessoes:
+                    print(f"👥 {sessions} sessao(oes), {args.reruns} rerun(s) cada...")
+                    level = await run_level(browser, url, sessions, args, pid)
+                    levels.append(level)
+                    print(f"   rerun p95: {level['rerun'].get('p95', float('nan')):.0f}ms | erros: {level['errors']} | sessoes com falha: {level['failed_sessions']}")
+            finally:
+                await browser.close()
+
+        print_report(levels)
+        report = {'url': url, 'started_at': datetime.now().isoformat(), 'levels': levels}
+        if args.saida:
+            with open(args.saida, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"💾 Resultado gravado em {args.saida}")
+        return report
+    finally:
+        if dashboard is not None:
+            dashboard.terminate()
+            try:
+                dashboard.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                dashboard.kill()
+        if data_server is not None:
+            data_server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do dashboard (sessoes Streamlit simultaneas)")
+    parser.add_argument('--sessoes', type=int, nargs='+', default=[1, 5, 10, 20], help="Niveis de sessoes simultaneas")
+    parser.add_argument('--reruns', type=int, default=10, help="Reruns por sessao")
+    parser.add_argument('--intervalo', type=float, default=1.0, help="Pausa media entre reruns (s)")
+    parser.add_argument('--rampa', type=float, default=5.0, help="Tempo para abrir todas as sessoes (s)")
+    parser.add_argument('--timeout', type=float, default=60.0, help="Limite por carga/rerun (s)")
+    parser.add_argument('--linhas-soc', type=int, default=15, help="Linhas da aba SOC no servidor local")
+    parser.add_argument('--linhas-hub', type=int, default=35, help="Linhas da aba HUB no servidor local")
+    parser.add_argument('--atraso-dados', type=float, default=0.0, help="Latencia simulada do servidor de dados (s)")
+    parser.add_argument('--porta', type=int, default=DASHBOARD_PORT, help="Porta do Streamlit iniciado pelo teste")
+    parser.add_argument('--url', default="", help="Usa um dashboard ja rodando em vez de iniciar um")
+    parser.add_argument('--pid', type=int, default=None, help="PID do Streamlit (com --url) para medir CPU/memoria")
+    parser.add_argument('--saida', default="", help="Grava o resultado em JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    sys.exit(0 if report and not any(level['errors'] for level in report['levels']) else 1)
+
+
+if __name__ == "__main__":
+    main()